@@ -0,0 +1,37 @@
+"""add user_recommendations table
+
+Revision ID: 24cfbb4a6931
+Revises: 4e6437141843
+Create Date: 2026-10-17 23:58:12.447061
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24cfbb4a6931'
+down_revision: Union[str, Sequence[str], None] = '4e6437141843'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_recommendations',
+        sa.Column('user_id', sa.String(length=50), nullable=False),
+        sa.Column('book_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('scores', postgresql.ARRAY(sa.Float(precision=24)), nullable=False),
+        sa.Column('built_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_recommendations')
@@ -0,0 +1,44 @@
+"""add users active loan count
+
+Revision ID: 2eef598ccf7d
+Revises: 4065ab87fbdc
+Create Date: 2026-10-17 19:03:48.712604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2eef598ccf7d'
+down_revision: Union[str, Sequence[str], None] = '4065ab87fbdc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('active_loan_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill: records that hold a copy (borrowed/overdue, request not rejected)
+    op.execute(
+        """
+        UPDATE users AS u
+        SET active_loan_count = l.loans
+        FROM (
+            SELECT user_id, count(*) AS loans
+            FROM borrow_records
+            WHERE borrow_status IN ('borrowed', 'overdue')
+              AND (request_status IS NULL OR request_status <> 'rejected')
+            GROUP BY user_id
+        ) AS l
+        WHERE u.user_id = l.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'active_loan_count')
@@ -0,0 +1,58 @@
+"""add updated_at to books and borrow_records for incremental exports
+
+Revision ID: 37dec8244a30
+Revises: 2eef598ccf7d
+Create Date: 2026-10-17 21:12:05.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '37dec8244a30'
+down_revision: Union[str, Sequence[str], None] = '2eef598ccf7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('books', 'borrow_records')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A trigger rather than ORM onupdate, so bulk/CTE UPDATEs bump it too
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False))
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], unique=False)
+
+    # Best available history for existing rows (before the triggers, which
+    # would overwrite it with now())
+    op.execute("UPDATE books SET updated_at = created_at WHERE created_at IS NOT NULL")
+    op.execute("UPDATE borrow_records SET updated_at = borrow_date WHERE borrow_date IS NOT NULL")
+
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table}")
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
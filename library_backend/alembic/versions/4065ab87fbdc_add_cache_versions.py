@@ -0,0 +1,35 @@
+"""add cache versions
+
+Revision ID: 4065ab87fbdc
+Revises: fb525f354dd8
+Create Date: 2026-10-17 17:22:04.381950
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4065ab87fbdc'
+down_revision: Union[str, Sequence[str], None] = 'fb525f354dd8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cache_versions = op.create_table(
+        'cache_versions',
+        sa.Column('scope', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('scope')
+    )
+    op.bulk_insert(cache_versions, [{'scope': 'catalog'}, {'scope': 'settings'}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_versions')
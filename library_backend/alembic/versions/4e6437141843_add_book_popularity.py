@@ -0,0 +1,52 @@
+"""add book_popularity ranking table
+
+Revision ID: 4e6437141843
+Revises: 37dec8244a30
+Create Date: 2026-10-17 22:40:31.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e6437141843'
+down_revision: Union[str, Sequence[str], None] = '37dec8244a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_popularity',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('heat', sa.Float(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('borrow_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('refreshed_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.book_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('book_id'),
+    )
+    op.create_index('ix_book_popularity_score_book_id', 'book_popularity', ['score', 'book_id'], unique=False)
+    op.create_index('ix_book_popularity_heat_book_id', 'book_popularity', ['heat', 'book_id'], unique=False)
+
+    op.create_table(
+        'ranking_watermarks',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_id', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('refreshed_at', sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    # The first refresh (on startup or via the CLI) fills book_popularity
+    op.execute("INSERT INTO ranking_watermarks (name) VALUES ('book_popularity')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ranking_watermarks')
+    op.drop_index('ix_book_popularity_heat_book_id', table_name='book_popularity')
+    op.drop_index('ix_book_popularity_score_book_id', table_name='book_popularity')
+    op.drop_table('book_popularity')
@@ -0,0 +1,52 @@
+"""add book search vector
+
+Revision ID: 5cbdec266560
+Revises: 882bfd1c5991
+Create Date: 2026-10-17 09:12:40.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5cbdec266560'
+down_revision: Union[str, Sequence[str], None] = '882bfd1c5991'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('books', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(book_title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(book_author, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(book_details, '')), 'C')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_books_book_title_trgm', 'books', ['book_title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'book_title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_books_book_author_trgm', 'books', ['book_author'], unique=False,
+        postgresql_using='gin', postgresql_ops={'book_author': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_book_author_trgm', table_name='books')
+    op.drop_index('ix_books_book_title_trgm', table_name='books')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,48 @@
+"""add book rating aggregates
+
+Revision ID: 6d9b63997b36
+Revises: 913687d5f79c
+Create Date: 2026-10-17 12:41:52.094518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d9b63997b36'
+down_revision: Union[str, Sequence[str], None] = '913687d5f79c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('rating_sum', sa.DECIMAL(precision=12, scale=1), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_user_rating_book_id', 'user_rating', ['book_id'], unique=False)
+
+    # Backfill from existing votes
+    op.execute(
+        """
+        UPDATE books AS b
+        SET rating_sum = r.total,
+            rating_count = r.n,
+            book_rating = round(r.total / r.n, 1)
+        FROM (
+            SELECT book_id, sum(rating) AS total, count(*) AS n
+            FROM user_rating
+            GROUP BY book_id
+        ) AS r
+        WHERE b.book_id = r.book_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_rating_book_id', table_name='user_rating')
+    op.drop_column('books', 'rating_count')
+    op.drop_column('books', 'rating_sum')
@@ -0,0 +1,50 @@
+"""add borrow_records indexes
+
+Revision ID: 913687d5f79c
+Revises: bc8221bd99e0
+Create Date: 2026-10-17 11:20:05.731964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '913687d5f79c'
+down_revision: Union[str, Sequence[str], None] = 'bc8221bd99e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_borrow_records_user_id_borrow_status', ['user_id', 'borrow_status'], None),
+    ('ix_borrow_records_user_id_request_status', ['user_id', 'request_status'], None),
+    ('ix_borrow_records_borrow_status', ['borrow_status'], None),
+    ('ix_borrow_records_request_status', ['request_status'], None),
+    ('ix_borrow_records_book_id', ['book_id'], None),
+    ('ix_borrow_records_active_return_date', ['return_date'], sa.text("borrow_status = 'borrowed'")),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps borrow_records writable while the indexes build,
+    # and cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(
+                name, 'borrow_records', columns, unique=False,
+                postgresql_where=where, postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name='borrow_records',
+                postgresql_concurrently=True, if_exists=True,
+            )
@@ -0,0 +1,31 @@
+"""add books created_at keyset index
+
+Revision ID: a29d0ccd6e13
+Revises: 24cfbb4a6931
+Create Date: 2026-10-18 00:41:27.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a29d0ccd6e13'
+down_revision: Union[str, Sequence[str], None] = '24cfbb4a6931'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_books_created_at_book_id', 'books',
+        [sa.text('created_at DESC'), sa.text('book_id DESC')], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_created_at_book_id', table_name='books')
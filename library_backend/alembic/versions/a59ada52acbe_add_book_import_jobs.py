@@ -0,0 +1,43 @@
+"""add book_import_jobs table
+
+Revision ID: a59ada52acbe
+Revises: a29d0ccd6e13
+Create Date: 2026-10-18 02:14:36.508211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a59ada52acbe'
+down_revision: Union[str, Sequence[str], None] = 'a29d0ccd6e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'book_import_jobs',
+        sa.Column('job_id', sa.String(length=32), nullable=False),
+        sa.Column('source', sa.String(length=255), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('rows_read', sa.Integer(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('errors', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False),
+        sa.Column('detail', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_import_jobs')
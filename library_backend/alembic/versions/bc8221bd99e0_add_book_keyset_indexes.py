@@ -0,0 +1,29 @@
+"""add book keyset indexes
+
+Revision ID: bc8221bd99e0
+Revises: 5cbdec266560
+Create Date: 2026-10-17 10:03:18.552907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bc8221bd99e0'
+down_revision: Union[str, Sequence[str], None] = '5cbdec266560'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_book_rating_book_id', 'books', ['book_rating', 'book_id'], unique=False)
+    op.create_index('ix_books_book_category_id_book_id', 'books', ['book_category_id', 'book_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_book_category_id_book_id', table_name='books')
+    op.drop_index('ix_books_book_rating_book_id', table_name='books')
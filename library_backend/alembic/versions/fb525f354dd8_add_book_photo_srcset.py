@@ -0,0 +1,28 @@
+"""add book photo srcset
+
+Revision ID: fb525f354dd8
+Revises: 6d9b63997b36
+Create Date: 2026-10-17 15:08:27.561203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fb525f354dd8'
+down_revision: Union[str, Sequence[str], None] = '6d9b63997b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('book_photo_srcset', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'book_photo_srcset')
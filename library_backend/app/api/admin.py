@@ -3,7 +3,8 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.user import UserCRUD
 from app.dependencies import get_db
-from app.core.security import create_access_token, get_current_user
+from app.core.security import create_access_token
+from app.dependencies import get_current_user
 from typing import Optional, List
 from app.models.user import User
 
@@ -6,7 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.user import UserCRUD
 from app.dependencies import get_db
-from app.core.security import verify_password, create_access_token
+from app.core.security import create_access_token
+from app.core.passwords import password_hasher
 
 router = APIRouter()
 
@@ -25,12 +26,22 @@ async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     
    ## print(payload.password)
     ##print(user.password)
-    if not user or not verify_password(payload.password, user.password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="INVALID_CREDENTIALS: Incorrect username or password."
         )
 
+    valid, new_hash = await password_hasher.verify_and_update(payload.password, user.password)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="INVALID_CREDENTIALS: Incorrect username or password."
+        )
+    if new_hash:
+        # Stored hash used an old BCRYPT_ROUNDS; upgrade it while we have the password
+        await UserCRUD.set_password_hash(db, user, new_hash)
+
     token = create_access_token(user_id=user.user_id, role=user.role)
 
     return {"access_token": token, "token_type": "Bearer"}
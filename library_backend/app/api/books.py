@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.models.book import Book
 from app.crud.book import BookCRUD
 from app.schemas.book import BookPublic, BookDetail, BookCreate, BookUpdate, RateBook, BookDetail2, UpdateFeatured
-from app.dependencies import get_db
+from app.dependencies import get_db, get_read_db
 #from app.core.security import get_current_user, get_current_admin
 from app.dependencies import get_current_user, get_current_admin
-from app.models.user_rating import UserRating
 from app.crud.book_review import BookReviewCRUD
 from app.schemas.book_review import BookReviewCreate, BookReviewOut
 
-from app.utils.minio_utils import upload_file
+from app.utils.minio_utils import upload_files_async, object_name_from_url
+from app.utils.images import build_srcset_async
+from app.utils.pagination import set_next_cursor
+from app.utils.http_cache import cached_by
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.cache_version import CATALOG_SCOPE
 from typing import Dict
-from sqlalchemy import select, and_, extract
-from datetime import datetime
 from app.models.user import User
+from app.schemas.book_import import BookImportJobOut, ImportFormat
+from app.core.book_import import detect_format, start_upload_import
+from app.crud.book_import_job import BookImportJobCRUD
+from app.core.principal import Principal
+from app.crud.recommendation import RecommendationCRUD
 
 
 
@@ -26,20 +33,26 @@ router = APIRouter()
 
 
 
-@router.get("/", response_model=List[BookPublic], tags=["Public Books"])
+CURSOR_DESCRIPTION = "Opaque cursor from the X-Next-Cursor header of the previous page; overrides page"
+
+
+@router.get("/", response_model=List[BookPublic], tags=["Public Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
 async def list_books(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    q: Optional[str] = Query(None, description="Search term"),
-    db: AsyncSession = Depends(get_db)
+    q: Optional[str] = Query(None, description="Full-text search over title, author and details"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db)
 ):
     skip = (page - 1) * page_size
-    books = await BookCRUD.get_books(db, skip=skip, limit=page_size, search=q)
+    books, next_cursor = await BookCRUD.get_books(db, skip=skip, limit=page_size, search=q, cursor=cursor)
+    set_next_cursor(response, next_cursor)
     return books
 
 
 @router.get("/count", tags=["Public Books"])
-async def count_books(db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
+async def count_books(db: AsyncSession = Depends(get_read_db)) -> Dict[str, int]:
     """
     Returns the total number of books in the library.
     Example response: {"total_books": 123}
@@ -50,12 +63,15 @@ async def count_books(db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
 
 @router.get("/all", response_model=List[BookDetail2], tags=["Admin Books"], dependencies=[Depends(get_current_user)])
 async def list_all_books(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     skip = (page - 1) * page_size
-    books = await BookCRUD.get_books(db, skip=skip, limit=page_size)
+    books, next_cursor = await BookCRUD.get_books(db, skip=skip, limit=page_size, cursor=cursor)
+    set_next_cursor(response, next_cursor)
     return books
 
 
@@ -81,9 +97,13 @@ async def create_book(
     book_audio: UploadFile = File(None),
     db: AsyncSession = Depends(get_db)
 ):
-    photo_url = upload_file(book_photo, folder="books")
-    pdf_url = upload_file(book_pdf, folder="book_pdfs") if book_pdf else None
-    audio_url = upload_file(book_audio, folder="book_audios") if book_audio else None
+    photo_url, pdf_url, audio_url = await upload_files_async(
+        (book_photo, "books"),
+        (book_pdf, "book_pdfs"),
+        (book_audio, "book_audios"),
+    )
+    # Best effort: a cover that can't be processed still gets saved
+    photo_srcset = await build_srcset_async(object_name_from_url(photo_url), book_photo.file)
 
     book_in = {
         "book_title": book_title,
@@ -94,6 +114,7 @@ async def create_book(
         "book_availability": book_availability,
         "book_count": book_count,
         "book_photo": photo_url,
+        "book_photo_srcset": photo_srcset,
         "book_pdf": pdf_url,
         "book_audio": audio_url,
     }
@@ -106,76 +127,125 @@ async def create_book(
 
 
 
-@router.get("/recommended", response_model=List[BookDetail], tags=["Books"])
+@router.post(
+    "/import",
+    response_model=BookImportJobOut,
+    status_code=202,
+    tags=["Admin Books"],
+    dependencies=[Depends(get_current_admin)]
+)
+async def import_books(
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = Query(None, description="Defaults to the file extension (.csv, .jsonl)"),
+):
+    """
+    Bulk-import books from a CSV (header row) or JSONL file.
+
+    Columns: book_title, book_author, category (title) or book_category_id,
+    book_count, book_details, featured, and book_photo / book_pdf /
+    book_audio as object names already in the bucket. Runs in the
+    background; poll GET /books/import/{job_id} for progress and per-row
+    errors. Thumbnails are left to `python -m app.cli backfill-thumbnails`.
+    """
+    fmt = format or detect_format(file.filename)
+    if not fmt:
+        raise HTTPException(status_code=400, detail="Unknown file format, pass ?format=csv or ?format=jsonl")
+    return await start_upload_import(file, fmt)
+
+
+@router.get("/import/{job_id}", response_model=BookImportJobOut, tags=["Admin Books"],
+            dependencies=[Depends(get_current_admin)])
+async def get_import_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Progress of an import, as of its last finished batch."""
+    job = await BookImportJobCRUD.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.get("/recommended", response_model=List[BookDetail], tags=["Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
 async def get_recommended_books(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
+    """Trending: books with the most recent borrow activity (refreshed periodically)."""
     skip = (page - 1) * page_size
-    stmt = (
-        select(Book)
-        .where(Book.book_rating.between(2.0, 3.0))
-        .offset(skip)
-        .limit(page_size)
+    books, next_cursor = await BookCRUD.get_trending_books(
+        db, skip=skip, limit=page_size, cursor=cursor
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    set_next_cursor(response, next_cursor)
+    return books
+
 
+@router.get("/recommended/me", response_model=List[BookDetail], tags=["Books"])
+async def get_my_recommendations(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Books picked for the current user from what similar readers borrowed
+    and rated (rebuilt offline). Users without enough history get popular
+    books from the categories they read, then from the whole catalog.
+    """
+    return await RecommendationCRUD.recommend(db, current_user.user_id, limit)
 
-@router.get("/popular", response_model=List[BookDetail], tags=["Books"])
+
+@router.get("/popular", response_model=List[BookDetail], tags=["Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
 async def get_popular_books(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
+    """Most popular books by decayed borrows, ratings and reviews (refreshed periodically)."""
     skip = (page - 1) * page_size
-    stmt = (
-        select(Book)
-        .where(Book.book_rating.between(4.0, 5.0))
-        .offset(skip)
-        .limit(page_size)
+    books, next_cursor = await BookCRUD.get_popular_books(
+        db, skip=skip, limit=page_size, cursor=cursor
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    set_next_cursor(response, next_cursor)
+    return books
 
 
-@router.get("/new", response_model=List[BookDetail], tags=["Books"])
+@router.get("/new", response_model=List[BookDetail], tags=["Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE, daily=True))])
 async def get_new_books(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    days: Optional[int] = Query(None, ge=0, le=366, description="Books added today or in the previous N days"),
+    month: Optional[str] = Query(None, description="Books added in this calendar month (YYYY-MM)"),
 ):
+    """New arrivals, newest first: the last NEW_BOOKS_DEFAULT_DAYS days unless days or month is given."""
     skip = (page - 1) * page_size
-    current_month = datetime.utcnow().month
-    current_year = datetime.utcnow().year
-
-    stmt = (
-        select(Book)
-        .where(
-            and_(
-                extract("month", Book.created_at) == current_month,
-                extract("year", Book.created_at) == current_year
-            )
-        )
-        .offset(skip)
-        .limit(page_size)
+    books, next_cursor = await BookCRUD.get_new_books(
+        db, skip=skip, limit=page_size, cursor=cursor, days=days, month=month
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    set_next_cursor(response, next_cursor)
+    return books
 
 
 
 
 @router.get("/featured", response_model=List[BookDetail2], tags=["Books"], dependencies=[Depends(get_current_user)])
 async def list_featured_books(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    search: Optional[str] = Query(None, description="Search by title, author, or details")
+    search: Optional[str] = Query(None, description="Search by title, author, or details"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     skip = (page - 1) * page_size
-    books = await BookCRUD.get_featured_books(db, skip=skip, limit=page_size, search=search)
+    books, next_cursor = await BookCRUD.get_featured_books(
+        db, skip=skip, limit=page_size, search=search, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
     return books
 
 
@@ -202,6 +272,7 @@ async def update_book_featured(
 
     db.add(book)
     await db.commit()
+    await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
     await db.refresh(book)
 
     return book
@@ -209,19 +280,24 @@ async def update_book_featured(
 
 
 
-@router.get("/books/{category_id}", response_model=List[BookDetail], tags=["Public Books"])
+@router.get("/books/{category_id}", response_model=List[BookDetail], tags=["Public Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
 async def list_books_by_category(
     category_id: int,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     """
     Fetch all books by a specific category ID.
-    Supports pagination and returns category title.
+    Supports page or cursor pagination and returns category title.
     """
     skip = (page - 1) * page_size
-    books = await BookCRUD.get_books_by_category(db, category_id, skip=skip, limit=page_size)
+    books, next_cursor = await BookCRUD.get_books_by_category(
+        db, category_id, skip=skip, limit=page_size, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
     return books
 
 
@@ -229,8 +305,8 @@ async def list_books_by_category(
 
 
 
-@router.get("/{book_id}", response_model=BookDetail2, tags=["Public Books"])
-async def book_details(book_id: int, db: AsyncSession = Depends(get_db)):
+@router.get("/{book_id}", response_model=BookDetail2, tags=["Public Books"], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
+async def book_details(book_id: int, db: AsyncSession = Depends(get_read_db)):
     book = await BookCRUD.get_book(db, book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -264,33 +340,10 @@ async def rate_book(
     db: AsyncSession = Depends(get_db),
     current_user: int = Depends(get_current_user)
 ):
-    book = await db.get(Book, book_id)
+    book = await BookCRUD.rate_book(db, book_id, current_user.user_id, data.rating)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    existing_rating = await db.execute(
-        select(UserRating).where(
-            UserRating.user_id == current_user.user_id,
-            UserRating.book_id == book_id
-        )
-    )
-    existing_rating = existing_rating.scalar_one_or_none()
-    if existing_rating:
-        raise HTTPException(status_code=400, detail="You have already rated this book")
-
-    new_rating = UserRating(user_id=current_user.user_id, book_id=book_id, rating=data.rating)
-    db.add(new_rating)
-
-    all_ratings = await db.execute(
-        select(UserRating.rating).where(UserRating.book_id == book_id)
-    )
-    all_ratings = [float(r[0]) for r in all_ratings.fetchall()] + [float(data.rating)]
-    book.book_rating = round(sum(all_ratings) / len(all_ratings), 1)
-
-    db.add(book)
-    await db.commit()
-    await db.refresh(book)
-
     return book
 
 
@@ -310,6 +363,6 @@ async def add_review(
 @router.get("/books/{book_id}/reviews", response_model=list[BookReviewOut])
 async def get_book_reviews(
     book_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     return await BookReviewCRUD.get_reviews(db, book_id)
\ No newline at end of file
@@ -1,9 +1,11 @@
 
 
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -18,12 +20,18 @@ from app.schemas.borrow import (
     BorrowCountResponse,
     BorrowDetailResponse,
     BorrowRequestRecord,
+    BorrowFilter,
+    PdfBorrowRecord,
+    BorrowBatchRequest,
+    BorrowBatchResponse,
 )
 
 
 
-from app.core.security import get_current_user
+from app.dependencies import get_current_user, get_current_admin, get_read_db
+from app.core.exceptions import validation_error
 from app.database import get_db
+from app.api import exports
 
 
 router = APIRouter()
@@ -32,20 +40,72 @@ router = APIRouter()
 get_current_active_user = get_current_user
 
 
+BORROW_PAGE_SIZE = 50
+BORROW_MAX_PAGE_SIZE = 500
+
+
+def borrow_filters(
+    user_id: Optional[str] = Query(None, description="Only borrows of this user"),
+    book_id: Optional[int] = Query(None, description="Only borrows of this book"),
+    borrow_status: Optional[str] = Query(None, description="borrowed / returned / overdue"),
+    request_status: Optional[str] = Query(None, description="pending / accepted / rejected"),
+    date_from: Optional[date] = Query(None, description="borrow_date on or after"),
+    date_to: Optional[date] = Query(None, description="borrow_date on or before"),
+    sort: str = Query("borrow_id", description="borrow_id, borrow_date or return_date; prefix '-' for descending"),
+) -> BorrowFilter:
+    try:
+        return BorrowFilter(
+            user_id=user_id,
+            book_id=book_id,
+            borrow_status=borrow_status,
+            request_status=request_status,
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+        )
+    except ValidationError as e:
+        raise validation_error({str(err["loc"][0]): err["msg"] for err in e.errors()})
+
+
+def borrow_page(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(BORROW_PAGE_SIZE, ge=1, le=BORROW_MAX_PAGE_SIZE),
+) -> dict:
+    return {"skip": (page - 1) * page_size, "limit": page_size}
+
+
 
 
 @router.get("/borrow/", response_model=List[BorrowDetailResponse])
 async def get_all_borrowed_books(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
     """
-    Admin: Get all users' borrow requests with book and user details.
+    Admin: Get users' borrow requests with book and user details, one page at a time.
     """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    return await BorrowCRUD.get_all_borrows_admin(db)
+    return await BorrowCRUD.get_all_borrows_admin(db, filters=filters, **paging)
+
+
+
+@router.get("/borrow/export", tags=["Borrow"])
+async def export_borrowed_books(
+    current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+):
+    """
+    Admin: Stream all matching borrow records as NDJSON (one JSON object per line),
+    through the same export path as GET /exports/borrows?format=ndjson.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return await exports._export(BorrowCRUD.details_query(filters), "borrows", "ndjson", gzip=False)
 
 
 
@@ -63,7 +123,7 @@ async def borrow_book(
 
 
 
-@router.post("/borrow/pdf/{book_id}", response_model=BorrowRecord, tags=["Borrow"])
+@router.post("/borrow/pdf/{book_id}", response_model=PdfBorrowRecord, tags=["Borrow"])
 async def borrow_pdf(
     book_id: int,
     db: AsyncSession = Depends(get_db),
@@ -75,6 +135,7 @@ async def borrow_pdf(
     - return_date = today
     - borrow_status = 'pdf-borrow'
     - request_status = 'accepted'
+    - pdf_url = presigned download link, valid for MINIO_PRESIGN_EXPIRY_SECONDS
     """
     return await BorrowCRUD.create_pdf_borrow(db=db, user=current_user, book_id=book_id)
 
@@ -85,13 +146,15 @@ async def borrow_pdf(
 
 @router.get("/borrow/my", response_model=List[BorrowDetailResponse])
 async def get_my_borrowed_books(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
     """
     User can see only their own borrow requests with book and user details.
     """
-    return await BorrowCRUD.get_my_borrow(db, user_id=current_user.user_id)
+    return await BorrowCRUD.get_my_borrow(db, user_id=current_user.user_id, filters=filters, **paging)
 
 
 
@@ -128,9 +191,39 @@ async def update_request_status(
 
 
 
+@router.post("/borrow/batch/accept", response_model=BorrowBatchResponse, dependencies=[Depends(get_current_admin)])
+async def batch_accept_requests(data: BorrowBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Admin: accept many pending requests in one transaction.
+    Returns a result per borrow_id; requests that aren't pending are skipped.
+    """
+    return await BorrowCRUD.batch_transition(db, data.borrow_ids, "accept")
+
+
+@router.post("/borrow/batch/reject", response_model=BorrowBatchResponse, dependencies=[Depends(get_current_admin)])
+async def batch_reject_requests(data: BorrowBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Admin: reject many pending requests in one transaction, returning their
+    reserved copies to the shelf.
+    """
+    return await BorrowCRUD.batch_transition(db, data.borrow_ids, "reject")
+
+
+@router.post("/borrow/batch/return", response_model=BorrowBatchResponse, dependencies=[Depends(get_current_admin)])
+async def batch_return_books(data: BorrowBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Admin: mark many accepted loans (borrowed or overdue) as returned in one
+    transaction.
+    """
+    return await BorrowCRUD.batch_transition(db, data.borrow_ids, "return")
+
+
+
+
+
 @router.get("/borrow/status/{status}/count", response_model=BorrowCountResponse)
 async def get_borrow_status_count(
-    status: str, db: AsyncSession = Depends(get_db), current_user: models.user.User = Depends(get_current_active_user)
+    status: str, db: AsyncSession = Depends(get_read_db), current_user: models.user.User = Depends(get_current_active_user)
 ):
    
     if current_user.role == "user":
@@ -144,16 +237,16 @@ async def get_borrow_status_count(
 @router.get("/borrow/status/{status}/list", response_model=List[BorrowRequestRecord])
 async def get_borrow_status_list(
     status: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: models.user.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
     
 
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-    result = await BorrowCRUD.list_by_borrow_status(db, status=status)
-    print("result :", result)
-    return result
+    return await BorrowCRUD.list_by_borrow_status(db, status=status, filters=filters, **paging)
 
 
 
@@ -161,7 +254,7 @@ async def get_borrow_status_list(
 
 @router.get("/borrow/request/{status}/count", response_model=BorrowCountResponse)
 async def get_request_status_count(
-    status: str, db: AsyncSession = Depends(get_db), current_user: models.user.User = Depends(get_current_active_user)
+    status: str, db: AsyncSession = Depends(get_read_db), current_user: models.user.User = Depends(get_current_active_user)
 ):
     
 
@@ -180,15 +273,17 @@ async def get_request_status_count(
 @router.get("/borrow/request/{status}/list", response_model=List[BorrowRequestRecord])
 async def get_borrow_status_list(
     status: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: models.user.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
     
 
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    return await BorrowCRUD.list_by_request_status(db, status=status)
+    return await BorrowCRUD.list_by_request_status(db, status=status, filters=filters, **paging)
 
 
 
@@ -197,7 +292,7 @@ async def get_borrow_status_list(
 @router.get("/borrow/status/{status}/count/my", response_model=BorrowCountResponse)
 async def get_my_borrow_status_count(
     status: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.user.User = Depends(get_current_active_user)
 ):
     
@@ -209,12 +304,16 @@ async def get_my_borrow_status_count(
 @router.get("/borrow/status/{status}/list/my", response_model=List[BorrowRequestRecord])
 async def get_borrow_status_list(
     status: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: models.user.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
     
     user_id = None if current_user.role == "admin" else current_user.user_id
-    return await BorrowCRUD.list_my_borrow_status(db, status=status, user_id=user_id)
+    return await BorrowCRUD.list_my_borrow_status(
+        db, status=status, user_id=user_id, filters=filters, **paging
+    )
 
 
 
@@ -223,7 +322,7 @@ async def get_borrow_status_list(
 
 @router.get("/borrow/request/{status}/count/my", response_model=BorrowCountResponse)
 async def get_request_status_count(
-    status: str, db: AsyncSession = Depends(get_db), current_user: models.user.User = Depends(get_current_active_user)
+    status: str, db: AsyncSession = Depends(get_read_db), current_user: models.user.User = Depends(get_current_active_user)
 ):
     
     user_id = None if current_user.role == "admin" else current_user.user_id
@@ -234,12 +333,16 @@ async def get_request_status_count(
 @router.get("/borrow/request/{status}/list/my", response_model=List[BorrowRecord])
 async def get_request_status_list(
     status: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: models.user.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.user.User = Depends(get_current_active_user),
+    filters: BorrowFilter = Depends(borrow_filters),
+    paging: dict = Depends(borrow_page),
 ):
    
     user_id = None if current_user.role == "admin" else current_user.user_id
-    return await BorrowCRUD.list_my_request_status(db, status=status, user_id=user_id)
+    return await BorrowCRUD.list_my_request_status(
+        db, status=status, user_id=user_id, filters=filters, **paging
+    )
 
 
 
@@ -3,11 +3,13 @@ from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.dependencies import get_db, get_current_admin, get_current_user
+from app.dependencies import get_db, get_read_db, get_current_admin, get_current_user
 from app.schemas.category import CategoryOut, CategoryUpdate, CategoryCreate
 from app.crud.category import CategoryCRUD
 from app.models.user import User
 from app.core.exceptions import not_found_error, conflict_error
+from app.utils.http_cache import cached_by
+from app.models.cache_version import CATALOG_SCOPE
 
 router = APIRouter(
     prefix="/books/category",
@@ -15,9 +17,9 @@ router = APIRouter(
 )
 
 
-@router.get("/all", response_model=List[CategoryOut])
+@router.get("/all", response_model=List[CategoryOut], dependencies=[Depends(cached_by(CATALOG_SCOPE))])
 async def list_categories(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
    
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100)
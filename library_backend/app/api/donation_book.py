@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Q
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app.dependencies import get_db, get_current_user, get_current_admin
-from app.utils.minio_utils import upload_file
+from app.utils.minio_utils import upload_files_async
 from app.crud.donation_book import DonationBookCRUD
 from app.schemas.donation_book import DonationBookPublic, DonationBookResponse
 
@@ -33,10 +33,12 @@ async def create_donation_book(
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    # ➤ 1. Upload to MinIO (same helper as Book API)
-    photo_url = upload_file(book_photo, folder="books")
-    pdf_url = upload_file(book_pdf, folder="book_pdfs") if book_pdf else None
-    audio_url = upload_file(book_audio, folder="book_audios") if book_audio else None
+    # ➤ 1. Upload to MinIO concurrently (same helper as Book API)
+    photo_url, pdf_url, audio_url = await upload_files_async(
+        (book_photo, "books"),
+        (book_pdf, "book_pdfs"),
+        (book_audio, "book_audios"),
+    )
 
     # ➤ 2. Prepare DB payload
     payload = {
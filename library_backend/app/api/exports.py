@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, cast, TIMESTAMP
+from starlette.background import BackgroundTask
+
+from app.crud.book import BookCRUD
+from app.crud.borrow import BorrowCRUD, STREAM_BATCH_SIZE
+from app.database import async_session, read_session
+from app.dependencies import get_current_admin
+from app.core.replica import replica_monitor
+from app.utils.streaming import (
+    CSV_MEDIA_TYPE, GZIP_MEDIA_TYPE, NDJSON_MEDIA_TYPE, PARQUET_MEDIA_TYPE,
+    arrow_schema, csv_lines, gzip_chunks, ndjson_lines, parquet_available, parquet_row_groups,
+)
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+# Database time the export started at; the next incremental run passes it
+# back as ?since=
+EXPORT_STARTED_HEADER = "X-Export-Started-At"
+
+# updated_at is the start time of the writing transaction, so a write still
+# in flight when an export runs is stamped before that export's watermark.
+# Incremental exports reach back this far to pick such rows up; rows near
+# the boundary can appear in two consecutive exports (dedupe by id).
+EXPORT_SINCE_OVERLAP = timedelta(minutes=5)
+
+SINCE_DESCRIPTION = (
+    "Only rows changed at or after this time (minus a 5 minute overlap): "
+    "pass the previous export's X-Export-Started-At"
+)
+
+
+# Export watermark, read in the export's own session: the database's time
+# (as stored in updated_at), or on a replica the commit time of the last
+# replayed transaction, so rows the replica hasn't received yet are not
+# counted as exported.
+WATERMARK_SQL = select(
+    cast(func.coalesce(func.pg_last_xact_replay_timestamp(), func.now()), TIMESTAMP)
+)
+
+
+async def _session_factory():
+    # Reporting reads tolerate a little lag, so use the replica when it's healthy
+    if replica_monitor is not None and await replica_monitor.healthy():
+        return read_session
+    return async_session
+
+
+async def _export(stmt, name: str, format: str, gzip: bool) -> StreamingResponse:
+    if format == "parquet":
+        if not parquet_available():
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+        if gzip:
+            raise HTTPException(status_code=400, detail="Parquet is already compressed, drop gzip")
+
+    # Request-scoped sessions are closed before a streaming body is sent,
+    # so the export owns its session for the lifetime of the stream.
+    db = (await _session_factory())()
+    try:
+        started_at = (await db.execute(WATERMARK_SQL)).scalar_one()
+    except Exception:
+        await db.close()
+        raise
+
+    async def rows():
+        try:
+            result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in result.mappings():
+                yield row
+        finally:
+            await db.close()
+
+    if format == "csv":
+        body, media_type = csv_lines(rows(), [column.name for column in stmt.selected_columns]), CSV_MEDIA_TYPE
+    elif format == "ndjson":
+        body, media_type = ndjson_lines(rows()), NDJSON_MEDIA_TYPE
+    else:
+        body, media_type = parquet_row_groups(rows(), arrow_schema(stmt.selected_columns)), PARQUET_MEDIA_TYPE
+
+    filename = f"{name}.{format}"
+    if gzip:
+        body, media_type, filename = gzip_chunks(body), GZIP_MEDIA_TYPE, f"{filename}.gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            EXPORT_STARTED_HEADER: started_at.isoformat(),
+        },
+        # Also covers a client that disconnects before the body starts
+        background=BackgroundTask(db.close),
+    )
+
+
+def _since(since: Optional[datetime]) -> Optional[datetime]:
+    if since is None:
+        return None
+    # updated_at is stored without time zone, in database (UTC) time
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since - EXPORT_SINCE_OVERLAP
+
+
+@router.get("/books")
+async def export_books(
+    format: ExportFormat = Query("csv"),
+    since: Optional[datetime] = Query(None, description=SINCE_DESCRIPTION),
+    gzip: bool = Query(False, description="Gzip the CSV/NDJSON stream"),
+):
+    """
+    Admin: stream the whole catalog (with category titles) from a
+    server-side cursor as CSV, NDJSON or Parquet.
+
+    Incremental exports (since) return inserted and updated books only;
+    deleted books are not reported, so reconcile with a full export.
+    """
+    return await _export(BookCRUD.export_query(_since(since)), "books", format, gzip)
+
+
+@router.get("/borrows")
+async def export_borrows(
+    format: ExportFormat = Query("csv"),
+    since: Optional[datetime] = Query(None, description=SINCE_DESCRIPTION),
+    gzip: bool = Query(False, description="Gzip the CSV/NDJSON stream"),
+):
+    """
+    Admin: stream the borrow history (with user and book) from a
+    server-side cursor as CSV, NDJSON or Parquet.
+
+    Incremental exports (since) return inserted and updated records only;
+    deleted records (including those removed along with a book or user)
+    are not reported, so reconcile with a full export.
+    """
+    return await _export(BorrowCRUD.export_query(_since(since)), "borrows", format, gzip)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+
+from app.dependencies import get_current_admin
+from app.core.passwords import password_hasher
+from app.database import engine, read_engine, pool_metrics
+from app.core.replica import replica_monitor
+from app.core.jobs import overdue_job, overdue_stats, popularity_job
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/passwords")
+async def password_hashing_metrics():
+    """
+    Password hashing pool: concurrency, queue depth, wait/hash latency and
+    how many logins were rejected (503) or transparently rehashed.
+    """
+    return password_hasher.metrics()
+
+
+@router.get("/db")
+async def database_pool_metrics():
+    """
+    Connection pool state per engine: connections checked out, overflow in
+    use, and how long requests waited for a connection.
+    """
+    return {
+        "primary": pool_metrics(engine),
+        "replica": {**pool_metrics(read_engine), **replica_monitor.metrics()} if read_engine else None,
+    }
+
+
+@router.get("/jobs")
+async def background_job_metrics():
+    """Scheduler state for this worker: runs, failures, last duration and result."""
+    return {
+        overdue_job.name: {**overdue_job.metrics(), **overdue_stats},
+        popularity_job.name: popularity_job.metrics(),
+    }
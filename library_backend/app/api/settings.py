@@ -3,11 +3,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.dependencies import get_db, get_current_admin
 from app.models.user import User
-from app.models.settings import Settings
+from app.models.cache_version import SETTINGS_SCOPE
+from app.utils.http_cache import cached_by
+from app.crud.settings import SettingsCRUD
+from app.core.library_settings import library_settings
 from app.schemas.settings import SettingsResponse, SettingsUpdate
 
 router = APIRouter(
@@ -19,11 +21,9 @@ router = APIRouter(
 
 @router.get("/admin", response_model=SettingsResponse)
 async def get_settings_admin(
-    admin: User = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    admin: User = Depends(get_current_admin)
 ):
-    result = await db.execute(select(Settings).limit(1))
-    setting = result.scalars().first()
+    setting = await library_settings.get()
     if not setting:
         raise HTTPException(status_code=404, detail="Settings not found")
     return setting
@@ -35,27 +35,18 @@ async def update_settings_admin(
     admin: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Settings).limit(1))
-    setting = result.scalars().first()
-    if not setting:
-        raise HTTPException(status_code=404, detail="Settings not found")
-
-    update_data = data.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(setting, key, value)
-
-    db.add(setting)
-    await db.commit()
-    await db.refresh(setting)
+    setting = await SettingsCRUD.update_settings(db, data)
+    # Other workers are told via NOTIFY; don't wait for it here
+    library_settings.invalidate()
     return setting
 
 
 # ------------------- Public Routes (Read-Only) -------------------
 
-@router.get("/public", response_model=SettingsResponse, tags=["Public Settings"])
-async def get_public_settings(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Settings).limit(1))
-    setting = result.scalars().first()
+@router.get("/public", response_model=SettingsResponse, tags=["Public Settings"],
+            dependencies=[Depends(cached_by(SETTINGS_SCOPE))])
+async def get_public_settings():
+    setting = await library_settings.get()
     if not setting:
         raise HTTPException(status_code=404, detail="Settings not found")
     return setting
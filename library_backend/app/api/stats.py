@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_read_db, get_current_user, get_current_admin
+from app.crud.stats import StatsCRUD
+from app.schemas.stats import DashboardStats, MyDashboardStats
+
+router = APIRouter(tags=["Stats"])
+
+
+@router.get("/dashboard", response_model=DashboardStats, dependencies=[Depends(get_current_admin)])
+async def get_dashboard_stats(db: AsyncSession = Depends(get_read_db)):
+    """
+    Admin: every dashboard counter (books, users, borrows by status,
+    requests by status) in one call.
+    """
+    return await StatsCRUD.dashboard(db)
+
+
+@router.get("/dashboard/my", response_model=MyDashboardStats)
+async def get_my_dashboard_stats(
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    The current user's borrow and request counts by status in one call.
+    """
+    return await StatsCRUD.dashboard(db, user_id=current_user.user_id)
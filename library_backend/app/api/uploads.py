@@ -1,17 +1,89 @@
-from fastapi import APIRouter, UploadFile, Depends
-from app.utils.minio_utils import upload_file
-from app.dependencies import get_current_admin
+from fastapi import APIRouter, UploadFile, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.minio_utils import upload_file_async, presigned_upload, confirm_upload, run_in_upload_pool, object_name_from_url
+from app.utils.images import build_srcset_async
+from app.dependencies import get_db, get_current_admin, get_current_user
+from app.crud.book import BookCRUD
+from app.crud.donation_book import DonationBookCRUD
+from app.schemas.upload import PresignUploadRequest, PresignUploadResponse, UploadComplete, UploadCompleteResponse
+from app.config import settings
 
 router = APIRouter()
 
 @router.post("/upload/user-photo", tags=["Uploads"], dependencies=[Depends(get_current_admin)])
 async def upload_user_photo(file: UploadFile):
     """Upload user profile photo to MinIO and return URL"""
-    file_url = upload_file(file, folder="users")
+    file_url = await upload_file_async(file, folder="users")
     return {"url": file_url}
 
 @router.post("/upload/book-photo", tags=["Uploads"], dependencies=[Depends(get_current_admin)])
 async def upload_book_photo(file: UploadFile):
     """Upload book photo to MinIO and return URL"""
-    file_url = upload_file(file, folder="books")
+    file_url = await upload_file_async(file, folder="books")
     return {"url": file_url}
+
+
+def _donation_owner(current_user):
+    """owner_email for DonationBookCRUD: None for admins, who may act on any donation."""
+    return None if current_user.role == "admin" else (current_user.user_email or "")
+
+
+async def _check_target(db: AsyncSession, current_user, target: str, target_id: int) -> None:
+    """Books are admin only; a donation only while pending, by its donor or an admin."""
+    if target == "book":
+        if current_user.role != "admin":
+            raise HTTPException(status_code=403, detail="FORBIDDEN")
+    elif not await DonationBookCRUD.get_pending(db, target_id, owner_email=_donation_owner(current_user)):
+        raise HTTPException(status_code=404, detail="Pending donation request not found")
+
+
+@router.post("/presign/upload", response_model=PresignUploadResponse, tags=["Uploads"])
+async def presign_upload(
+    data: PresignUploadRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Get a presigned POST policy to upload a book photo, PDF or audio file
+    straight to storage, for a Book (admin only) or a pending DonationBook
+    request (its donor or an admin). Storage enforces the size limit.
+    Call /files/presign/complete afterwards to attach it to the record;
+    uploads never completed are removed by `python -m app.cli sweep-uploads`.
+    """
+    await _check_target(db, current_user, data.target, data.target_id)
+    object_name, upload_url, fields = presigned_upload(data.field, data.filename)
+    return PresignUploadResponse(
+        object_name=object_name,
+        upload_url=upload_url,
+        fields=fields,
+        expires_in=settings.MINIO_PRESIGN_EXPIRY_SECONDS,
+    )
+
+
+@router.post("/presign/complete", response_model=UploadCompleteResponse, tags=["Uploads"])
+async def complete_presigned_upload(
+    data: UploadComplete,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Record a finished presigned upload on a Book (admin only) or on a
+    pending DonationBook request (its donor or an admin).
+    """
+    await _check_target(db, current_user, data.target, data.target_id)
+
+    url = await run_in_upload_pool(confirm_upload, data.field, data.object_name)
+
+    if data.target == "book":
+        srcset = None
+        if data.field == "book_photo":
+            srcset = await build_srcset_async(object_name_from_url(url))
+        record = await BookCRUD.set_media(db, data.target_id, data.field, url, srcset=srcset)
+        if not record:
+            raise HTTPException(status_code=404, detail="Book not found")
+    else:
+        record = await DonationBookCRUD.set_media(db, data.target_id, data.field, url, owner_email=_donation_owner(current_user))
+        if not record:
+            raise HTTPException(status_code=404, detail="Pending donation request not found")
+
+    return {"url": url}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.user import UserCRUD
-from app.dependencies import get_db
+from app.dependencies import get_db, get_read_db
 from app.schemas.user import UserOut, UserList
 from typing import Dict
 
@@ -9,7 +9,7 @@ from typing import Dict
 router = APIRouter(tags=["Users"])
 
 @router.get("/", response_model=UserList)
-async def get_users(skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_db)):
+async def get_users(skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_read_db)):
     users = await UserCRUD.get_all_users(db, skip=skip, limit=limit)
     return UserList(
         data=[UserOut.from_orm(u) for u in users],
@@ -18,7 +18,7 @@ async def get_users(skip: int = 0, limit: int = 20, db: AsyncSession = Depends(g
 
 
 @router.get("/count", tags=["Users"])
-async def count_users(db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
+async def count_users(db: AsyncSession = Depends(get_read_db)) -> Dict[str, int]:
     """
     Returns the total number of registered users (members).
     Example response: {"total_users": 100}
@@ -30,7 +30,7 @@ async def count_users(db: AsyncSession = Depends(get_db)) -> Dict[str, int]:
 
 
 @router.get("/{user_id}", response_model=UserOut)
-async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
+async def get_user(user_id: str, db: AsyncSession = Depends(get_read_db)):
     user = await UserCRUD.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="USER_NOT_FOUND")
@@ -0,0 +1,244 @@
+"""
+Maintenance commands, run from the backend directory:
+
+    python -m app.cli <command> [options]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import timedelta
+
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.database import async_session
+from app.models.user import User
+from app.crud.recommendation import RecommendationCRUD
+from app.crud.book import BookCRUD
+from app.crud.borrow import BorrowCRUD
+from app.utils.images import build_srcset_for_url, thumbnail_formats
+from app.utils.minio_utils import run_in_upload_pool, sweep_pending_uploads
+from app.core.passwords import PasswordHasher, pwd_context
+from app.core.jobs import sweep_overdue, refresh_popularity as popularity_refresh
+from app.core.book_import import import_jobs, detect_format, run_import_file
+
+
+async def reconcile_ratings(args):
+    async with async_session() as db:
+        fixed = await BookCRUD.reconcile_ratings(db)
+    print(f"Reconciled rating aggregates for {fixed} book(s)")
+
+
+async def reconcile_loans(args):
+    async with async_session() as db:
+        fixed = await BorrowCRUD.reconcile_loan_counts(db)
+    print(f"Reconciled active loan counts for {fixed} user(s)")
+
+
+async def mark_overdue(args):
+    result = await sweep_overdue()
+    if result["skipped"]:
+        print("Another process is running the overdue sweep; nothing done")
+    else:
+        print(f"Marked {result['rows_marked']} borrow(s) overdue in {result['duration_ms']} ms")
+
+
+async def refresh_popularity(args):
+    result = await popularity_refresh(full=args.full)
+    if result["skipped"]:
+        print("Another process is refreshing popularity; nothing done")
+    else:
+        print(
+            f"Popularity refreshed up to borrow {result['last_borrow_id']} in {result['duration_ms']} ms: "
+            f"{result['books_added']} added, {result['books_borrowed']} with new borrows, "
+            f"{result['scores_updated']} rescored"
+        )
+
+
+async def backfill_thumbnails(args):
+    if not thumbnail_formats():
+        raise SystemExit("Pillow with WebP support is required to build thumbnails")
+
+    done = failed = 0
+    after_id = 0
+    async with async_session() as db:
+        while True:
+            rows = await BookCRUD.get_photos_for_thumbnails(db, after_id, args.batch_size, args.force)
+            if not rows:
+                break
+            after_id = rows[-1].book_id
+
+            # The upload pool bounds how many images are processed at once
+            results = await asyncio.gather(*(
+                run_in_upload_pool(build_srcset_for_url, row.book_photo) for row in rows
+            ))
+            srcsets = {row.book_id: srcset for row, srcset in zip(rows, results) if srcset}
+            await BookCRUD.set_photo_srcsets(db, srcsets)
+
+            done += len(srcsets)
+            failed += len(rows) - len(srcsets)
+            print(f"... up to book {after_id}: {done} done, {failed} failed")
+
+    print(f"Built thumbnails for {done} book(s), {failed} failed")
+
+
+async def sweep_uploads(args):
+    # Presigned policies expire after MINIO_PRESIGN_EXPIRY_SECONDS, so older
+    # pending objects can't be mid-upload any more
+    older_than = timedelta(seconds=max(args.older_than, settings.MINIO_PRESIGN_EXPIRY_SECONDS))
+    removed = await asyncio.to_thread(sweep_pending_uploads, older_than)
+    print(f"Removed {removed} unconfirmed upload(s) older than {older_than}")
+
+
+async def bench_hashing(args):
+    """Simulate a login storm: `logins` concurrent verifies through the hashing pool."""
+    workers = args.workers or os.cpu_count() or 1
+    hasher = PasswordHasher(workers=workers, max_queue=args.logins)
+    hashed = pwd_context.hash("benchmark-password")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        hasher.verify_and_update("benchmark-password", hashed) for _ in range(args.logins)
+    ))
+    elapsed = time.perf_counter() - started
+    assert all(ok for ok, _ in results)
+
+    metrics = hasher.metrics()
+    print(f"{args.logins} logins, {workers} worker(s), bcrypt rounds {metrics['bcrypt_rounds']}")
+    print(f"  elapsed      {elapsed:.2f} s")
+    print(f"  throughput   {args.logins / elapsed:.1f} logins/s ({args.logins / elapsed / workers:.1f} per core)")
+    print(f"  hash time    {metrics['avg_hash_ms']} ms avg")
+    print(f"  queue wait   {metrics['avg_wait_ms']} ms avg, {metrics['max_wait_ms']} ms max")
+
+
+async def import_books(args):
+    fmt = args.format or detect_format(args.path)
+    if not fmt:
+        raise SystemExit("Can't tell the format from the file name; pass --format csv|jsonl")
+
+    def progress(job):
+        print(f"... {job.rows_read} rows read: {job.inserted} inserted, {job.failed} failed")
+
+    job = await import_jobs.create(os.path.basename(args.path), fmt)
+    await run_import_file(job, args.path, batch_size=args.batch_size, on_batch=progress)
+
+    for error in job.errors:
+        print(f"  line {error['line']}: {error['detail']}")
+    if job.failed > len(job.errors):
+        print(f"  ... and {job.failed - len(job.errors)} more")
+    if job.status == "failed":
+        raise SystemExit(f"Import aborted: {job.detail}")
+    print(f"Imported {job.inserted} book(s) from {job.rows_read} row(s), {job.failed} failed")
+
+
+def _print_build(result):
+    print(
+        f"{result['users']} users x {result['books']} books, {result['interactions']} interactions, "
+        f"{result['similarities']} similar pairs kept"
+    )
+    print(f"  load      {result['load_ms']} ms")
+    print(f"  compute   {result['compute_ms']} ms")
+    if "write_ms" in result:
+        print(f"  write     {result['write_ms']} ms ({result['written']} users)")
+    print(f"  total     {result['total_ms']} ms")
+
+
+def _recommendation_builder():
+    # numpy/scipy are only needed by these commands, not by the API
+    try:
+        from app.core.recommendations import build_recommendations
+    except ImportError as e:
+        raise SystemExit(f"{e}; install requirements-worker.txt to build recommendations")
+    return build_recommendations
+
+
+async def build_recommendations(args):
+    build = _recommendation_builder()
+    _print_build(await build(dry_run=args.dry_run))
+
+
+async def bench_recommendations(args):
+    """Time a dry-run build, then GET /books/recommended/me's query for random users."""
+    if not args.skip_build:
+        build = _recommendation_builder()
+        _print_build(await build(dry_run=True))
+
+    async with async_session() as db:
+        user_ids = (await db.execute(
+            select(User.user_id).order_by(func.random()).limit(args.requests)
+        )).scalars().all()
+        latencies = []
+        for user_id in user_ids:
+            started = time.perf_counter()
+            await RecommendationCRUD.recommend(db, user_id, args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    if not latencies:
+        raise SystemExit("No users to benchmark")
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{len(latencies)} requests, top {args.limit}")
+    print(f"  p50   {statistics.median(latencies):.2f} ms")
+    print(f"  p95   {p95:.2f} ms")
+    print(f"  max   {latencies[-1]:.2f} ms")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Library backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("reconcile-ratings", help="Recompute book rating aggregates from user_rating")
+    cmd.set_defaults(handler=reconcile_ratings)
+
+    cmd = commands.add_parser("reconcile-loans", help="Recompute users' active loan counts from borrow_records")
+    cmd.set_defaults(handler=reconcile_loans)
+
+    cmd = commands.add_parser("mark-overdue", help="Mark accepted borrows past their return date as overdue (once)")
+    cmd.set_defaults(handler=mark_overdue)
+
+    cmd = commands.add_parser("refresh-popularity", help="Update book_popularity from new borrows and book changes")
+    cmd.add_argument("--full", action="store_true", help="rebuild from all borrows (after changing the half-life)")
+    cmd.set_defaults(handler=refresh_popularity)
+
+    cmd = commands.add_parser("backfill-thumbnails", help="Generate book_photo srcset derivatives for existing books")
+    cmd.add_argument("--batch-size", type=int, default=20, help="books processed per round (default: 20)")
+    cmd.add_argument("--force", action="store_true", help="rebuild books that already have a srcset")
+    cmd.set_defaults(handler=backfill_thumbnails)
+
+    cmd = commands.add_parser("sweep-uploads", help="Delete presigned uploads that were never confirmed")
+    cmd.add_argument("--older-than", type=int, default=86400, help="minimum age in seconds (default: 86400)")
+    cmd.set_defaults(handler=sweep_uploads)
+
+    cmd = commands.add_parser("import-books", help="Bulk-import books from a CSV or JSONL file")
+    cmd.add_argument("path", help="file to import (.csv with a header row, or .jsonl)")
+    cmd.add_argument("--format", choices=["csv", "jsonl"], default=None, help="override the format from the extension")
+    cmd.add_argument("--batch-size", type=int, default=None, help="rows per insert (default: BOOK_IMPORT_BATCH_SIZE)")
+    cmd.set_defaults(handler=import_books)
+
+    cmd = commands.add_parser("build-recommendations", help="Rebuild per-user recommendations (needs numpy/scipy)")
+    cmd.add_argument("--dry-run", action="store_true", help="compute and report, but keep the stored set")
+    cmd.set_defaults(handler=build_recommendations)
+
+    cmd = commands.add_parser("bench-recommendations", help="Measure recommendation build time and request latency")
+    cmd.add_argument("--requests", type=int, default=200, help="random users to fetch recommendations for (default: 200)")
+    cmd.add_argument("--limit", type=int, default=20, help="books per request (default: 20)")
+    cmd.add_argument("--skip-build", action="store_true", help="only measure request latency")
+    cmd.set_defaults(handler=bench_recommendations)
+
+    cmd = commands.add_parser("bench-hashing", help="Measure login (bcrypt verify) throughput per core")
+    cmd.add_argument("--logins", type=int, default=200, help="number of concurrent logins (default: 200)")
+    cmd.add_argument("--workers", type=int, default=None, help="hashing threads (default: CPU count)")
+    cmd.set_defaults(handler=bench_hashing)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
 # app/config.py
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_READ_URL: Optional[str] = None   # read replica for GET-only routes
+    DB_ECHO: bool = False                     # SQL logging; costly, for debugging only
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800               # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 500            # SQLAlchemy compiled-statement cache
+    DB_STATEMENT_CACHE_SIZE: int = 100        # asyncpg per-connection statement cache
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    REPLICA_MAX_LAG_SECONDS: float = 5        # beyond this, reads go to the primary
+    REPLICA_LAG_CHECK_SECONDS: float = 2
+    REPLICA_CHECK_TIMEOUT_SECONDS: float = 1
+    READ_YOUR_WRITES_SECONDS: float = 10      # a writer's own reads stay on the primary this long
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 20000000
@@ -15,6 +30,51 @@ class Settings(BaseSettings):
     MINIO_ACCESS_KEY: str
     MINIO_SECRET_KEY: str
     MINIO_BUCKET: str = "media"
+    MINIO_UPLOAD_CONCURRENCY: int = 8    # parallel uploads per worker
+    MINIO_UPLOAD_MAX_QUEUE: int = 32     # uploads allowed to wait for a slot before 503
+    MINIO_REGION: str = "us-east-1"
+    MINIO_PUBLIC_ENDPOINT: Optional[str] = None   # host:port clients use for presigned URLs
+    MINIO_PUBLIC_SECURE: bool = False
+    MINIO_PRESIGN_EXPIRY_SECONDS: int = 900
+
+    THUMBNAIL_WIDTHS: List[int] = [160, 320, 640]   # book_photo srcset widths
+    THUMBNAIL_QUALITY: int = 75
+
+    STATS_CACHE_TTL_SECONDS: float = 5
+    SETTINGS_CACHE_MAX_AGE_SECONDS: float = 300   # fallback reload if a NOTIFY is missed
+
+    OVERDUE_SWEEP_INTERVAL_SECONDS: float = 300   # 0 disables the in-app sweep (use the CLI from cron)
+    OVERDUE_SWEEP_BATCH_SIZE: int = 1000
+    NEW_BOOKS_DEFAULT_DAYS: int = 30   # /books/new window when neither days nor month is given
+    POPULARITY_REFRESH_INTERVAL_SECONDS: float = 600   # 0 disables the in-app refresh (use the CLI from cron)
+    POPULARITY_HALF_LIFE_DAYS: float = 30              # changing it needs `refresh-popularity --full`
+    RECOMMENDATIONS_PER_USER: int = 50       # books stored per user by build-recommendations
+    RECOMMENDATION_NEIGHBORS: int = 100      # most similar books kept per book in the item-item matrix
+    # Public catalog responses: revalidate each time (cheap 304), but let
+    # browsers/CDNs serve a stale copy briefly while they do.
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
+    HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS: int = 30
+
+    BOOK_IMPORT_BATCH_SIZE: int = 500      # rows per INSERT ... RETURNING (and per commit)
+    BOOK_IMPORT_MAX_ERRORS: int = 1000     # row errors kept on a job; later ones are only counted
+    BOOK_IMPORT_JOBS_KEPT: int = 50        # finished jobs kept in book_import_jobs for GET /books/import/{id}
+
+    # Cached users are dropped in every worker on update/delete via NOTIFY.
+    # If a worker's listener is down, it can keep serving a deleted or
+    # demoted user for up to USER_CACHE_TTL_SECONDS (no Redis) or
+    # USER_CACHE_LOCAL_TTL_SECONDS (with REDIS_URL).
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_LOCAL_TTL_SECONDS: float = 5   # in-process layer when REDIS_URL is shared
+    USER_CACHE_MAXSIZE: int = 10000
+    REDIS_URL: Optional[str] = None
+    # Admin checks trust the JWT role claim (no DB/cache lookup). Only turn
+    # on if it is acceptable that a demoted or deleted admin keeps admin
+    # rights until their token expires (JWT_EXPIRATION_MINUTES).
+    AUTH_ROLE_FROM_TOKEN: bool = False
+
+    BCRYPT_ROUNDS: int = 12                       # changing it rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: Optional[int] = None   # defaults to the CPU count
+    PASSWORD_HASH_MAX_QUEUE: int = 256            # waiting hashes allowed before 503
 
 
     class Config:
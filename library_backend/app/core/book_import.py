@@ -0,0 +1,354 @@
+"""
+Bulk book import from CSV or JSONL.
+
+The file is parsed incrementally, one batch at a time, off the event loop,
+so a 20k-title file is never held in memory. For each batch:
+
+  - categories resolve through a title/id map loaded once per job,
+  - referenced media objects are stat'ed in parallel on the upload pool,
+  - the valid rows go in with one INSERT ... RETURNING and one commit.
+
+A bad row is recorded with its line number and skipped. It never aborts
+the job. That includes lines that are not valid UTF-8 and malformed CSV
+records: the file is decoded line by line so one bad byte costs one row.
+
+Progress lives on the ImportJob and is written to book_import_jobs after
+every batch, so GET /books/import/{id} works from any worker. The import
+itself runs on the worker that received the file; if that worker dies
+the job stays "running" with the progress of its last batch.
+"""
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.crud.book import BookCRUD
+from app.crud.book_import_job import BookImportJobCRUD
+from app.database import async_session
+from app.schemas.book_import import BookImportRow
+from app.utils.minio_utils import MEDIA_FIELDS, run_in_upload_pool, stat_media
+
+logger = logging.getLogger(__name__)
+
+# Parsed line: (line number, row dict) or (line number, parse error message)
+ParsedLine = Tuple[int, Union[dict, str]]
+
+# Backoff (seconds) when the upload pool turns a stat away with 503; the
+# queue is shared with interactive uploads, so a burst can fill it briefly
+STAT_RETRY_DELAYS = (0.5, 1, 2, 4, 8)
+
+# Statuses stat_media raises for a bad reference: these are row errors
+ROW_ERROR_STATUSES = {400, 404}
+
+
+@dataclass
+class ImportJob:
+    source: str
+    format: str
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "running"     # running | done | failed
+    rows_read: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    detail: Optional[str] = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+    def row_failed(self, line: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.BOOK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+    def finish(self, status: str, detail: Optional[str] = None) -> None:
+        self.status = status
+        self.detail = detail
+        self.finished_at = datetime.now(timezone.utc)
+
+
+async def _save(job: ImportJob) -> None:
+    async with async_session() as db:
+        await BookImportJobCRUD.save(db, job)
+
+
+async def _save_progress(job: ImportJob) -> None:
+    """Persist progress; a failed write is logged and never fails the import."""
+    try:
+        await _save(job)
+    except SQLAlchemyError:
+        logger.warning("Book import %s: saving progress failed", job.job_id, exc_info=True)
+
+
+class ImportJobs:
+    """Starts jobs and keeps their tasks alive. Their state is in book_import_jobs."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._tasks = set()
+
+    async def create(self, source: str, fmt: str) -> ImportJob:
+        job = ImportJob(source=source, format=fmt)
+        await _save(job)
+        async with async_session() as db:
+            await BookImportJobCRUD.prune(db, self.keep)
+        return job
+
+    def spawn(self, coro) -> None:
+        # Keep a reference so the task isn't garbage collected mid-import
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+import_jobs = ImportJobs(settings.BOOK_IMPORT_JOBS_KEPT)
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    return {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}.get(extension)
+
+
+def _decoded_lines(binary: BinaryIO) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """(line number, text, decode error) per physical line; bad bytes become U+FFFD."""
+    for line_no, raw in enumerate(binary, start=1):
+        if line_no == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield line_no, raw.decode("utf-8"), None
+        except UnicodeDecodeError as e:
+            yield line_no, raw.decode("utf-8", errors="replace"), f"Invalid UTF-8 on line {line_no}: {e.reason}"
+
+
+def _iter_csv(binary: BinaryIO) -> Iterator[ParsedLine]:
+    decode_errors = []
+
+    def lines():
+        for _, text, error in _decoded_lines(binary):
+            if error:
+                decode_errors.append(error)
+            yield text
+
+    reader = csv.DictReader(lines())
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV header: {e}")
+    if decode_errors:
+        raise ValueError(decode_errors[0])
+    if not fieldnames:
+        return
+
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # The reader starts afresh on the next line. DictReader only
+            # updates its own line_num after a good record
+            decode_errors.clear()
+            yield reader.reader.line_num, f"Invalid CSV: {e}"
+            continue
+        # line_num is the physical line the record ended on
+        if decode_errors:
+            yield reader.line_num, decode_errors[0]
+            decode_errors.clear()
+            continue
+        yield reader.line_num, {key.strip(): value for key, value in row.items() if key}
+
+
+def _iter_jsonl(binary: BinaryIO) -> Iterator[ParsedLine]:
+    for line_no, line, error in _decoded_lines(binary):
+        if error:
+            yield line_no, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        yield line_no, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def iter_rows(binary: BinaryIO, fmt: str) -> Iterator[ParsedLine]:
+    """Lazily parse an import file. Blocking: drive it from a thread."""
+    return _iter_csv(binary) if fmt == "csv" else _iter_jsonl(binary)
+
+
+def _next_batch(rows: Iterator[ParsedLine], size: int) -> List[ParsedLine]:
+    batch = []
+    for parsed in rows:
+        batch.append(parsed)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+    )
+
+
+def _resolve(raw: dict, categories: Dict[str, int], category_ids: set) -> dict:
+    """Validate a parsed row and map it to Book column values (media unchecked)."""
+    row = BookImportRow(**raw)
+    if row.book_category_id is not None:
+        if row.book_category_id not in category_ids:
+            raise ValueError(f"Unknown book_category_id {row.book_category_id}")
+        category_id = row.book_category_id
+    else:
+        category_id = categories.get(row.category.lower())
+        if category_id is None:
+            raise ValueError(f"Unknown category {row.category!r}")
+
+    return {
+        "book_title": row.book_title,
+        "book_author": row.book_author,
+        "book_category_id": category_id,
+        "book_details": row.book_details,
+        "book_count": row.book_count,
+        "book_availability": row.book_count > 0,
+        "featured": row.featured,
+        "book_photo": row.book_photo,
+        "book_pdf": row.book_pdf,
+        "book_audio": row.book_audio,
+    }
+
+
+async def _check_media(values: dict, slots: asyncio.Semaphore) -> dict:
+    """
+    Stat every referenced object concurrently and swap in the stored URLs.
+    A full upload queue is retried with backoff; if it stays full the 503
+    propagates and fails the job instead of marking the row bad.
+    """
+    fields = [name for name in MEDIA_FIELDS if values[name]]
+
+    async def stat(name):
+        for delay in (*STAT_RETRY_DELAYS, None):
+            try:
+                async with slots:
+                    return await run_in_upload_pool(stat_media, name, values[name])
+            except HTTPException as e:
+                if e.status_code != 503 or delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    urls = await asyncio.gather(*(stat(name) for name in fields))
+    return {**values, **dict(zip(fields, urls))}
+
+
+async def run_import(
+    job: ImportJob,
+    binary: BinaryIO,
+    batch_size: Optional[int] = None,
+    on_batch: Optional[Callable[[ImportJob], None]] = None,
+) -> ImportJob:
+    batch_size = batch_size or settings.BOOK_IMPORT_BATCH_SIZE
+    # Never queue more stats than the pool runs at once, so an import can't
+    # push interactive uploads into UPLOAD_QUEUE_FULL
+    slots = asyncio.Semaphore(settings.MINIO_UPLOAD_CONCURRENCY)
+    rows = iter_rows(binary, job.format)
+
+    try:
+        async with async_session() as db:
+            categories = await BookCRUD.category_map(db)
+            category_ids = set(categories.values())
+
+            while True:
+                batch = await asyncio.to_thread(_next_batch, rows, batch_size)
+                if not batch:
+                    break
+                job.rows_read += len(batch)
+
+                lines, resolved = [], []
+                for line, raw in batch:
+                    if isinstance(raw, str):
+                        job.row_failed(line, raw)
+                        continue
+                    try:
+                        resolved.append(_resolve(raw, categories, category_ids))
+                        lines.append(line)
+                    except ValidationError as e:
+                        job.row_failed(line, _validation_message(e))
+                    except ValueError as e:
+                        job.row_failed(line, str(e))
+
+                checked = await asyncio.gather(
+                    *(_check_media(values, slots) for values in resolved), return_exceptions=True
+                )
+                ready_lines, ready = [], []
+                for line, result in zip(lines, checked):
+                    if isinstance(result, HTTPException) and result.status_code in ROW_ERROR_STATUSES:
+                        job.row_failed(line, result.detail)
+                    elif isinstance(result, BaseException):
+                        raise result
+                    else:
+                        ready_lines.append(line)
+                        ready.append(result)
+
+                try:
+                    job.inserted += len(await BookCRUD.insert_books(db, ready))
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    for line in ready_lines:
+                        job.row_failed(line, f"Insert failed: {e.__class__.__name__}")
+                    logger.warning("Book import %s: batch insert failed: %s", job.job_id, e)
+
+                await _save_progress(job)
+                if on_batch:
+                    on_batch(job)
+    except Exception as e:
+        logger.exception("Book import %s failed", job.job_id)
+        job.finish("failed", repr(e))
+    else:
+        job.finish("done")
+    await _save_progress(job)
+    return job
+
+
+async def run_import_file(job: ImportJob, path: str, remove: bool = False, **kwargs) -> ImportJob:
+    """run_import over a file on disk, optionally deleting it afterwards."""
+    try:
+        with open(path, "rb") as binary:
+            return await run_import(job, binary, **kwargs)
+    finally:
+        if remove:
+            os.unlink(path)
+
+
+def _copy_to_temp(source: BinaryIO, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="book-import-", suffix=suffix)
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(source, out)
+    return path
+
+
+async def start_upload_import(file: UploadFile, fmt: str) -> ImportJob:
+    """
+    Start importing an uploaded file in the background. The upload is copied
+    to a temp file first because FastAPI closes it when the request ends.
+    """
+    path = await asyncio.to_thread(_copy_to_temp, file.file, f".{fmt}")
+    try:
+        job = await import_jobs.create(file.filename or "upload", fmt)
+    except BaseException:
+        os.unlink(path)
+        raise
+    import_jobs.spawn(run_import_file(job, path, remove=True))
+    return job
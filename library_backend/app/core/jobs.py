@@ -0,0 +1,46 @@
+"""Background jobs run by every API worker (see lifespan in app.main)."""
+import time
+from datetime import date
+
+from app.config import settings
+from app.crud.borrow import BorrowCRUD
+from app.crud.popularity import PopularityCRUD
+from app.database import async_session
+from app.utils.scheduler import PeriodicJob
+
+# Cumulative counters for /metrics/jobs (per worker)
+overdue_stats = {"rows_marked_total": 0, "runs_skipped": 0}
+
+
+async def sweep_overdue() -> dict:
+    started = time.perf_counter()
+    async with async_session() as db:
+        marked = await BorrowCRUD.mark_overdue(db, date.today(), settings.OVERDUE_SWEEP_BATCH_SIZE)
+    if marked is None:
+        overdue_stats["runs_skipped"] += 1
+    else:
+        overdue_stats["rows_marked_total"] += marked
+    return {
+        "rows_marked": marked or 0,
+        "skipped": marked is None,   # another replica held the lock
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+async def refresh_popularity(full: bool = False) -> dict:
+    started = time.perf_counter()
+    async with async_session() as db:
+        result = await PopularityCRUD.refresh(db, full=full)
+    return {
+        **(result or {}),
+        "skipped": result is None,   # another replica held the lock
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+overdue_job = PeriodicJob("overdue-sweep", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, sweep_overdue)
+popularity_job = PeriodicJob("popularity-refresh", settings.POPULARITY_REFRESH_INTERVAL_SECONDS, refresh_popularity)
+
+jobs = [
+    job for job in (overdue_job, popularity_job) if job.interval > 0
+]
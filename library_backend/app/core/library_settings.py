@@ -0,0 +1,84 @@
+"""
+In-memory copy of the single `settings` row (borrow limits).
+
+Borrowing and the settings endpoints read limits from here instead of
+querying the row each time. It is loaded on first use and reloaded after:
+
+- a NOTIFY on SETTINGS_CHANNEL, sent by SettingsCRUD.update_settings in the
+  same transaction as the change, so every worker hears about it;
+- a (re)connect of the listener (app.core.pg_listener), since
+  notifications may have been missed;
+- SETTINGS_CACHE_MAX_AGE_SECONDS, as a safety net should the listener be down.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.crud.settings import SettingsCRUD, SETTINGS_CHANNEL
+from app.core.pg_listener import pg_listener
+from app.database import async_session
+
+DEFAULT_BORROW_DAY_LIMIT = 14
+DEFAULT_BORROW_DAY_EXTENSION_LIMIT = 0
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    setting_id: int
+    borrow_day_limit: int
+    borrow_day_extension_limit: int
+    borrow_max_limit: int
+    updated_at: Optional[datetime]
+
+
+class LibrarySettings:
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._loaded_at = 0.0
+
+    async def get(self) -> Optional[SettingsSnapshot]:
+        """Current settings, or None if the row does not exist yet."""
+        if time.monotonic() - self._loaded_at < self.max_age:
+            return self._snapshot
+        async with self._lock:
+            if time.monotonic() - self._loaded_at >= self.max_age:
+                generation = self._generation
+                async with async_session() as db:
+                    row = await SettingsCRUD.get_settings(db)
+                self._snapshot = SettingsSnapshot(
+                    setting_id=row.setting_id,
+                    borrow_day_limit=row.borrow_day_limit,
+                    borrow_day_extension_limit=row.borrow_day_extension_limit,
+                    borrow_max_limit=row.borrow_max_limit,
+                    updated_at=row.updated_at,
+                ) if row else None
+                # An invalidation that arrived mid-load forces another load next time
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+        return self._snapshot
+
+    async def borrow_day_limit(self) -> int:
+        snapshot = await self.get()
+        return snapshot.borrow_day_limit if snapshot else DEFAULT_BORROW_DAY_LIMIT
+
+    async def borrow_day_extension_limit(self) -> int:
+        snapshot = await self.get()
+        return snapshot.borrow_day_extension_limit if snapshot else DEFAULT_BORROW_DAY_EXTENSION_LIMIT
+
+    async def borrow_max_limit(self) -> int:
+        snapshot = await self.get()
+        return snapshot.borrow_max_limit if snapshot else settings.MAX_BORROW_LIMIT
+
+
+library_settings = LibrarySettings(max_age=settings.SETTINGS_CACHE_MAX_AGE_SECONDS)
+pg_listener.subscribe(SETTINGS_CHANNEL, lambda payload: library_settings.invalidate())
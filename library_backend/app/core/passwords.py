@@ -0,0 +1,107 @@
+"""
+bcrypt hashing off the event loop.
+
+A bcrypt call is ~250 ms of CPU at the default cost. Run inline in a
+handler it stalls every other request on the worker, so all hashing goes
+through a dedicated thread pool (bcrypt releases the GIL, so threads use
+real cores). At most PASSWORD_HASH_WORKERS calls run at once and up to
+PASSWORD_HASH_MAX_QUEUE more may wait; beyond that callers get a 503
+instead of piling up.
+
+The cost factor is BCRYPT_ROUNDS. Hashes made with any other cost are
+reported as needing an update, so login can rehash them transparently.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import settings
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(workers)
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._hash_seconds = 0.0
+
+    async def _run(self, func, *args):
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise HTTPException(status_code=503, detail="AUTH_BUSY: try again shortly")
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        started_at = time.perf_counter()
+        waited = started_at - queued_at
+        self._wait_seconds += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        self._running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._running -= 1
+            self._completed += 1
+            self._hash_seconds += time.perf_counter() - started_at
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check `password`; returns (ok, new_hash). new_hash is set when the
+        stored hash used a different cost and should be replaced.
+        """
+        ok, new_hash = await self._run(pwd_context.verify_and_update, password.strip(), hashed.strip())
+        if new_hash:
+            self._rehashed += 1
+        return ok, new_hash
+
+    def metrics(self) -> dict:
+        completed = self._completed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "running": self._running,
+            "queued": self._waiting,
+            "completed": completed,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+            "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else 0.0,
+            "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+            "avg_hash_ms": round(self._hash_seconds / completed * 1000, 2) if completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
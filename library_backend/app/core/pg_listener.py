@@ -0,0 +1,90 @@
+"""
+One LISTEN connection per worker, shared by every in-process cache that
+other workers invalidate through Postgres NOTIFY.
+
+Callbacks are registered per channel with subscribe() and receive the
+NOTIFY payload. After a (re)connect they receive None instead: anything
+sent while the worker was not listening has been missed, so subscribers
+should drop everything they cache.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+LISTENER_RETRY_SECONDS = 5
+
+Callback = Callable[[Optional[str]], None]
+
+
+def _listener_dsn() -> str:
+    """
+    asyncpg DSN for the engine's database, keeping its query options
+    (sslmode, application_name, ...). `ssl` is what SQLAlchemy passes to
+    asyncpg as a keyword; in a DSN asyncpg only knows it as sslmode.
+    """
+    query = {key: value for key, value in engine.url.query.items() if key != "prepared_statement_cache_size"}
+    if "ssl" in query:
+        query.setdefault("sslmode", query.pop("ssl"))
+    return engine.url.set(drivername="postgresql", query=query).render_as_string(hide_password=False)
+
+
+class PgListener:
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callback]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    def _dispatch(self, channel: str, payload: Optional[str]) -> None:
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("NOTIFY handler for %s failed", channel)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._dispatch(channel, payload)
+
+    async def _listen(self) -> None:
+        # A dedicated connection, outside the pool: it stays open for LISTEN
+        dsn = _listener_dsn()
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    closed = asyncio.Event()
+                    connection.add_termination_listener(lambda _: closed.set())
+                    for channel in self._callbacks:
+                        await connection.add_listener(channel, self._on_notify)
+                        self._dispatch(channel, None)   # anything sent while we were not listening
+                    await closed.wait()
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("NOTIFY listener disconnected; retrying", exc_info=True)
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+pg_listener = PgListener()
@@ -0,0 +1,127 @@
+"""
+Authenticated-user principal and its cache.
+
+get_current_user used to load the full User row on every request. The
+fields endpoints actually need (id, name, email, role) are kept here as an
+immutable Principal, cached per user_id:
+
+- in-process TTL/LRU cache (always), and
+- Redis, when REDIS_URL is set and the redis package is installed, so
+  workers share entries. The in-process layer then uses the shorter
+  USER_CACHE_LOCAL_TTL_SECONDS, bounding how long another worker can serve
+  a user after it was changed.
+
+UserCRUD invalidates entries on update/delete: locally and in Redis after
+the commit, and in every other worker through a NOTIFY on PRINCIPAL_CHANNEL
+sent in the same transaction (see app.core.pg_listener). Should the
+listener be down, other workers serve a changed user for at most their
+local TTL; after it reconnects they drop their whole local cache. Redis
+problems are logged and treated as a miss; they never fail authentication.
+"""
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.pg_listener import pg_listener
+from app.utils.cache import TTLCache, get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+
+# Postgres NOTIFY channel; the payload is the user_id to drop
+PRINCIPAL_CHANNEL = "principal_invalidate"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: str
+    role: str
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            user_id=user.user_id,
+            user_name=user.user_name,
+            user_email=user.user_email,
+            role=user.role,
+        )
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        """Principal built from JWT claims alone (no name/email)."""
+        return cls(user_id=claims["sub"], role=claims.get("role"))
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, maxsize: int, redis_url: Optional[str] = None, local_ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.redis = get_redis(redis_url)
+        self.local = TTLCache(local_ttl if (self.redis and local_ttl is not None) else ttl, maxsize)
+
+    def peek(self, user_id: str) -> Optional[Principal]:
+        """In-process lookup only; never waits on Redis."""
+        return self.local.get(user_id)
+
+    async def get(self, user_id: str) -> Optional[Principal]:
+        principal = self.local.get(user_id)
+        if principal is not None or self.redis is None:
+            return principal
+        try:
+            raw = await self.redis.get(REDIS_KEY_PREFIX + user_id)
+        except Exception:
+            logger.warning("Principal cache read failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        try:
+            principal = Principal(**json.loads(raw))
+        except (ValueError, TypeError):
+            return None
+        self.local.set(user_id, principal)
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        self.local.set(principal.user_id, principal)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(REDIS_KEY_PREFIX + principal.user_id, json.dumps(asdict(principal)), ex=int(self.ttl))
+        except Exception:
+            logger.warning("Principal cache write failed", exc_info=True)
+
+    async def invalidate(self, user_id: str) -> None:
+        self.local.delete(user_id)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(REDIS_KEY_PREFIX + user_id)
+        except Exception:
+            logger.warning("Principal cache invalidation failed", exc_info=True)
+
+    @staticmethod
+    async def notify_invalidation(db: AsyncSession, user_id: str) -> None:
+        """Tell every worker to drop `user_id`; delivered when `db` commits."""
+        await db.execute(select(func.pg_notify(PRINCIPAL_CHANNEL, user_id)))
+
+    def _on_notify(self, payload: Optional[str]) -> None:
+        if payload is None:
+            self.local.clear()
+        else:
+            self.local.delete(payload)
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    redis_url=settings.REDIS_URL,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+)
+pg_listener.subscribe(PRINCIPAL_CHANNEL, principal_cache._on_notify)
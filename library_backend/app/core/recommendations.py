@@ -0,0 +1,169 @@
+"""
+Item-item collaborative filtering for GET /books/recommended/me.
+
+Built offline by `python -m app.cli build-recommendations`:
+
+  1. R (users x books, sparse CSR) from borrow and rating history, one
+     weighted entry per user/book pair (RecommendationCRUD.stream_interactions).
+     The COO triplets are packed into typed arrays as rows stream in, so the
+     full result set is never held as Python tuples.
+  2. S = cosine-normalised co-occurrence R^T R with the diagonal removed,
+     pruned to the RECOMMENDATION_NEIGHBORS most similar books per book.
+  3. Scores R S, a block of users at a time, so the dense users x books
+     matrix never exists. Books a user already has are masked out, and
+     the top RECOMMENDATIONS_PER_USER go to user_recommendations.
+
+numpy and scipy are only needed here and are installed from
+requirements-worker.txt, not requirements.txt. The API never imports this
+module. It only reads the stored arrays.
+"""
+import asyncio
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.config import settings
+from app.crud.recommendation import RecommendationCRUD
+from app.database import async_session
+
+# Users scored per sparse product; bounds peak memory of R S
+USER_BLOCK_SIZE = 2048
+
+
+@dataclass
+class Interactions:
+    user_ids: np.ndarray      # row index -> user_id
+    book_ids: np.ndarray      # column index -> book_id
+    matrix: sp.csr_matrix     # users x books, interest weights
+
+
+class InteractionsBuilder:
+    """
+    Accumulates (user_id, book_id, weight) rows into COO arrays as they
+    arrive. Ids are mapped to row/column indexes in order of first sight.
+    """
+
+    def __init__(self):
+        self.user_index: Dict[str, int] = {}
+        self.book_index: Dict[int, int] = {}
+        self.rows = array("i")
+        self.columns = array("i")
+        self.weights = array("f")
+
+    def add(self, user_id: str, book_id: int, weight: float) -> None:
+        self.rows.append(self.user_index.setdefault(user_id, len(self.user_index)))
+        self.columns.append(self.book_index.setdefault(book_id, len(self.book_index)))
+        self.weights.append(weight)
+
+    def build(self) -> Interactions:
+        user_ids = np.array(list(self.user_index), dtype=object)
+        book_ids = np.fromiter(self.book_index, dtype=np.int64, count=len(self.book_index))
+        matrix = sp.csr_matrix(
+            (
+                np.frombuffer(self.weights, dtype=np.float32),
+                (np.frombuffer(self.rows, dtype=np.int32), np.frombuffer(self.columns, dtype=np.int32)),
+            ),
+            shape=(len(user_ids), len(book_ids)),
+        )
+        return Interactions(user_ids, book_ids, matrix)
+
+
+def _top_per_row(matrix: sp.csr_matrix, n: int) -> sp.csr_matrix:
+    """Keep the n largest entries of each row."""
+    indptr, indices, data = [0], [], []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values, columns = matrix.data[start:end], matrix.indices[start:end]
+        if len(values) > n:
+            keep = np.argpartition(values, -n)[-n:]
+            values, columns = values[keep], columns[keep]
+        indices.append(columns)
+        data.append(values)
+        indptr.append(indptr[-1] + len(values))
+    return sp.csr_matrix(
+        (np.concatenate(data) if data else [], np.concatenate(indices) if indices else [], indptr),
+        shape=matrix.shape,
+    )
+
+
+def item_similarity(interactions: sp.csr_matrix, neighbors: int) -> sp.csr_matrix:
+    """Cosine similarity between books (columns), top `neighbors` per book."""
+    co_occurrence = (interactions.T @ interactions).tocsr()
+    norms = np.sqrt(co_occurrence.diagonal())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    scale = sp.diags(inverse.astype(np.float32))
+    similarity = (scale @ co_occurrence @ scale).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return _top_per_row(similarity, neighbors)
+
+
+def top_k(interactions: sp.csr_matrix, similarity: sp.csr_matrix, k: int) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """(user row, book columns, scores) best first, excluding books the user already has."""
+    for start in range(0, interactions.shape[0], USER_BLOCK_SIZE):
+        block = interactions[start:start + USER_BLOCK_SIZE]
+        scores = (block @ similarity).tocsr()
+        for offset in range(block.shape[0]):
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            columns, values = scores.indices[lo:hi], scores.data[lo:hi]
+            seen = block.indices[block.indptr[offset]:block.indptr[offset + 1]]
+            fresh = ~np.isin(columns, seen) & (values > 0)
+            columns, values = columns[fresh], values[fresh]
+            if not len(values):
+                continue
+            if len(values) > k:
+                keep = np.argpartition(values, -k)[-k:]
+                columns, values = columns[keep], values[keep]
+            order = np.argsort(-values, kind="stable")
+            yield start + offset, columns[order], values[order]
+
+
+def compute(builder: InteractionsBuilder, k: int, neighbors: int) -> Tuple[List[dict], dict]:
+    """CPU part of the build: rows to store, plus matrix stats."""
+    interactions = builder.build()
+    similarity = item_similarity(interactions.matrix, neighbors)
+    recommendations = [
+        {
+            "user_id": interactions.user_ids[row],
+            "book_ids": interactions.book_ids[columns].tolist(),
+            "scores": values.astype(float).tolist(),
+        }
+        for row, columns, values in top_k(interactions.matrix, similarity, k)
+    ]
+    stats = {
+        "users": interactions.matrix.shape[0],
+        "books": interactions.matrix.shape[1],
+        "interactions": interactions.matrix.nnz,
+        "similarities": similarity.nnz,
+    }
+    return recommendations, stats
+
+
+async def build_recommendations(dry_run: bool = False) -> dict:
+    """Rebuild user_recommendations (unless dry_run) and report stage timings."""
+    timings = {}
+    started = time.perf_counter()
+    async with async_session() as db:
+        builder = InteractionsBuilder()
+        async for user_id, book_id, weight in RecommendationCRUD.stream_interactions(db):
+            builder.add(user_id, book_id, weight)
+        timings["load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        mark = time.perf_counter()
+        recommendations, stats = await asyncio.to_thread(
+            compute, builder, settings.RECOMMENDATIONS_PER_USER, settings.RECOMMENDATION_NEIGHBORS
+        )
+        timings["compute_ms"] = round((time.perf_counter() - mark) * 1000, 2)
+
+        written = 0
+        if not dry_run:
+            mark = time.perf_counter()
+            written = await RecommendationCRUD.replace_all(db, recommendations)
+            timings["write_ms"] = round((time.perf_counter() - mark) * 1000, 2)
+
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return {**stats, "users_with_recommendations": len(recommendations), "written": written, **timings}
@@ -0,0 +1,122 @@
+"""
+Decides whether a read may go to the replica (DATABASE_READ_URL).
+
+Reads use the primary instead when:
+
+- the replica is behind by more than REPLICA_MAX_LAG_SECONDS, or its lag
+  check fails. The check runs at most every REPLICA_LAG_CHECK_SECONDS.
+- the caller made a successful write within the last
+  READ_YOUR_WRITES_SECONDS, so they always see their own changes (e.g. a
+  new borrow request). Writers are marked by the middleware in app.main.
+  The marks are shared through Redis when REDIS_URL is set; otherwise
+  they are per worker.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.core.security import decode_access_token
+from app.database import read_engine
+from app.utils.cache import TTLCache, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when everything received
+# has been replayed (an idle primary must not look like lag). NULL on a
+# server that is not a standby, which we also read as 0.
+LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+RECENT_WRITER_PREFIX = "recent-writer:"
+
+
+class ReplicaMonitor:
+    def __init__(self, engine: AsyncEngine, max_lag: float, interval: float, timeout: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.timeout = timeout
+        self.lag: Optional[float] = None
+        self.is_healthy = False
+        self.checked_at = -math.inf
+        self._lock = asyncio.Lock()
+
+    async def _measure(self) -> float:
+        async with self.engine.connect() as conn:
+            lag = (await conn.execute(LAG_SQL)).scalar()
+        return float(lag or 0)
+
+    async def healthy(self) -> bool:
+        """Replica usable right now? Refreshes the lag reading when it is stale."""
+        if time.monotonic() - self.checked_at >= self.interval and not self._lock.locked():
+            async with self._lock:
+                try:
+                    self.lag = await asyncio.wait_for(self._measure(), self.timeout)
+                    self.is_healthy = self.lag <= self.max_lag
+                except Exception:
+                    logger.warning("Replica lag check failed; reading from primary", exc_info=True)
+                    self.lag = None
+                    self.is_healthy = False
+                self.checked_at = time.monotonic()
+        return self.is_healthy
+
+    def metrics(self) -> dict:
+        return {"healthy": self.is_healthy, "lag_seconds": self.lag, "max_lag_seconds": self.max_lag}
+
+
+class RecentWriters:
+    """user_ids that wrote within the read-your-writes window."""
+
+    def __init__(self, window: float, redis_url: Optional[str] = None):
+        self.window = window
+        self.local = TTLCache(window, maxsize=100_000)
+        self.redis = get_redis(redis_url)
+
+    async def mark(self, user_id: str) -> None:
+        self.local.set(user_id, True)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(RECENT_WRITER_PREFIX + user_id, 1, px=int(self.window * 1000))
+        except Exception:
+            logger.warning("Could not share read-your-writes mark", exc_info=True)
+
+    async def contains(self, user_id: str) -> bool:
+        if user_id in self.local:
+            return True
+        if self.redis is None:
+            return False
+        try:
+            return bool(await self.redis.exists(RECENT_WRITER_PREFIX + user_id))
+        except Exception:
+            return True   # unsure, so stay on the primary
+
+
+replica_monitor = ReplicaMonitor(
+    read_engine,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    interval=settings.REPLICA_LAG_CHECK_SECONDS,
+    timeout=settings.REPLICA_CHECK_TIMEOUT_SECONDS,
+) if read_engine else None
+
+recent_writers = RecentWriters(settings.READ_YOUR_WRITES_SECONDS, settings.REDIS_URL)
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """user_id from a 'Bearer <jwt>' header, without touching the DB."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    payload = decode_access_token(authorization[7:])
+    return payload.get("sub") if payload else None
@@ -2,9 +2,13 @@ from sqlalchemy import and_, extract, or_
 from typing import Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from sqlalchemy import update, delete
-from app.models.book import Book
+from sqlalchemy import update, delete, insert
+from app.crud.cache_version import CacheVersionCRUD
+from app.crud.borrow import BorrowCRUD
+from app.models.cache_version import CATALOG_SCOPE
+from app.models.book import Book, SEARCH_CONFIG
 from app.models.category import Category
+from app.models.popularity import BookPopularity
 from app.schemas.book import BookCreate, BookUpdate
 from app.models.user_rating import UserRating
 from fastapi import HTTPException, status
@@ -13,8 +17,17 @@ from sqlalchemy import or_
 from pydantic import HttpUrl
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy import case
+from datetime import datetime, timedelta
+from typing import Tuple
+from app.config import settings
+from app.core.exceptions import validation_error
+from app.utils.pagination import keyset, keyset_page
 
+# Stable sort keys for keyset pagination (all descending, PK last as tie-breaker)
+CATALOG_ORDER = (Book.book_id,)
+NEW_ORDER = (Book.created_at, Book.book_id)
 
 
 class BookCRUD:
@@ -136,49 +149,118 @@ class BookCRUD:
         db: AsyncSession,
         skip: int = 0,
         limit: int = 20,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
     ):
         """
         Return books with optional search. Each book will also include its category_title.
-        Searches title, author, and details (case-insensitive).
+        Searches title, author, and details through the weighted full-text index,
+        ranked by relevance; falls back to trigram fuzzy matching on title/author
+        when the full-text query has no hits (typos, partial words).
+        Without a search term, books are returned newest first and can be paged
+        with the returned cursor. Returns (books, next_cursor).
         """
         stmt = (
             select(Book, Category.category_title)
             .join(Category, Category.category_id == Book.book_category_id)
         )
+        return await BookCRUD._search(db, stmt, skip=skip, limit=limit, search=search, cursor=cursor)
 
-    # Normalize search: None if empty or only spaces
-        if search is not None:
-            search = search.strip()
-            if search == "":
-                search = None
-
-    # Apply search condition
-        if search:
-            pattern = f"%{search}%"
-            stmt = stmt.where(
-                or_(
-                    Book.book_title.ilike(pattern),
-                    Book.book_author.ilike(pattern),
-                    Book.book_details.ilike(pattern),
-                )
-            )
 
-    # Add pagination
-        stmt = stmt.offset(skip).limit(limit)
+    @staticmethod
+    def _normalize_search(search: Optional[str]) -> Optional[str]:
+        # None if empty or only spaces
+        if search is None:
+            return None
+        search = search.strip()
+        return search or None
+
+
+    @staticmethod
+    def _fulltext(stmt, search: str):
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+        return (
+            stmt.where(Book.search_vector.op("@@")(tsquery))
+            .order_by(func.ts_rank_cd(Book.search_vector, tsquery).desc(), Book.book_id)
+        )
 
-    # Execute query
-        result = await db.execute(stmt)
-        rows = result.all()
 
-    # Transform results: attach category_title to each book
+    @staticmethod
+    def _fuzzy(stmt, search: str):
+        # `%` is the pg_trgm similarity operator, served by the trigram GIN indexes
+        similarity = func.greatest(
+            func.similarity(Book.book_title, search),
+            func.similarity(Book.book_author, search),
+        )
+        return (
+            stmt.where(or_(Book.book_title.op("%")(search), Book.book_author.op("%")(search)))
+            .order_by(similarity.desc(), Book.book_id)
+        )
+
+
+    @staticmethod
+    def _attach_category(rows) -> List[Book]:
         books = []
         for book, category_title in rows:
             book.category_title = category_title
             books.append(book)
-
         return books
 
+
+    @staticmethod
+    async def _keyset(db: AsyncSession, stmt, order, skip: int, limit: int, cursor: Optional[str]):
+        """
+        Page a (Book, category_title) select on a stable `order`.
+        With a cursor, OFFSET is skipped entirely. Returns (books, next_cursor).
+        """
+        stmt = keyset(stmt, order, cursor)
+        if not cursor:
+            stmt = stmt.offset(skip)
+        result = await db.execute(stmt.limit(limit + 1))
+        books = BookCRUD._attach_category(result.all())
+        return keyset_page(books, limit, order)
+
+
+    @staticmethod
+    async def _search(
+        db: AsyncSession,
+        stmt,
+        skip: int,
+        limit: int,
+        search: Optional[str],
+        cursor: Optional[str] = None,
+    ):
+        """
+        Run a (Book, category_title) select with optional ranked search and
+        attach category_title to each book. Returns (books, next_cursor).
+        """
+        search = BookCRUD._normalize_search(search)
+
+        if not search:
+            return await BookCRUD._keyset(db, stmt, CATALOG_ORDER, skip, limit, cursor)
+
+        # Relevance order has no stable key to resume from
+        if cursor:
+            raise validation_error({"cursor": "Cursor paging is not supported with a search term"})
+
+        result = await db.execute(BookCRUD._fulltext(stmt, search).offset(skip).limit(limit))
+        rows = result.all()
+
+        # Only fall back when full-text has no hits at all, not when the
+        # caller simply paged past the last full-text result.
+        if not rows:
+            has_match = False
+            if skip:
+                match = await db.execute(
+                    select(BookCRUD._fulltext(stmt, search).limit(1).exists())
+                )
+                has_match = match.scalar()
+            if not has_match:
+                result = await db.execute(BookCRUD._fuzzy(stmt, search).offset(skip).limit(limit))
+                rows = result.all()
+
+        return BookCRUD._attach_category(rows), None
+
         
     # @staticmethod
     # async def get_books(db: AsyncSession, skip: int = 0, limit: int = 20, search: Optional[str] = None):
@@ -233,6 +315,7 @@ class BookCRUD:
         db_book = Book(**book_data)
         db.add(db_book)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(db_book)
         return db_book
 
@@ -259,9 +342,14 @@ class BookCRUD:
                 else:
                     setattr(db_book, key, value)
 
+        # Thumbnails belong to the old photo; the backfill regenerates them
+        if update_data.get("book_photo") is not None:
+            db_book.book_photo_srcset = None
+
         # Commit changes
         db.add(db_book)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(db_book)
         return db_book
 
@@ -293,6 +381,110 @@ class BookCRUD:
     #     return True
 
 
+    @staticmethod
+    async def set_media(db: AsyncSession, book_id: int, field: str, url: str, srcset: Optional[dict] = None):
+        """
+        Point a media column (book_photo / book_pdf / book_audio) at an
+        uploaded object. Returns None if the book does not exist.
+        """
+        db_book = await db.get(Book, book_id)
+        if not db_book:
+            return None
+        setattr(db_book, field, url)
+        if field == "book_photo":
+            db_book.book_photo_srcset = srcset
+        await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+        return db_book
+
+
+    @staticmethod
+    async def get_photos_for_thumbnails(db: AsyncSession, after_id: int = 0, limit: int = 100, force: bool = False):
+        """
+        (book_id, book_photo) pairs after `after_id`, in book_id order, for books
+        whose srcset is missing (or all books with a photo when `force`).
+        """
+        stmt = (
+            select(Book.book_id, Book.book_photo)
+            .where(Book.book_id > after_id, Book.book_photo.isnot(None))
+            .order_by(Book.book_id)
+            .limit(limit)
+        )
+        if not force:
+            stmt = stmt.where(Book.book_photo_srcset.is_(None))
+        result = await db.execute(stmt)
+        return result.all()
+
+
+    @staticmethod
+    async def set_photo_srcsets(db: AsyncSession, srcsets: dict) -> None:
+        """Store generated srcsets, keyed by book_id."""
+        if not srcsets:
+            return
+        await db.execute(
+            update(Book),
+            [{"book_id": book_id, "book_photo_srcset": srcset} for book_id, srcset in srcsets.items()],
+        )
+        await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+
+
+    @staticmethod
+    def export_query(since: Optional[datetime] = None):
+        """Books with their category title, oldest change first, for exports."""
+        stmt = (
+            select(
+                Book.book_id,
+                Book.book_title,
+                Book.book_author,
+                Book.book_category_id,
+                Category.category_title,
+                Book.book_details,
+                Book.book_count,
+                Book.book_availability,
+                Book.book_rating,
+                Book.rating_count,
+                Book.book_review_count,
+                Book.featured,
+                Book.book_photo,
+                Book.book_pdf,
+                Book.book_audio,
+                Book.created_at,
+                Book.updated_at,
+            )
+            .outerjoin(Category, Category.category_id == Book.book_category_id)
+            .order_by(Book.updated_at, Book.book_id)
+        )
+        if since is not None:
+            stmt = stmt.where(Book.updated_at >= since)
+        return stmt
+
+
+    @staticmethod
+    async def category_map(db: AsyncSession) -> dict:
+        """{lowercased category_title: category_id} for resolving imported rows."""
+        result = await db.execute(select(Category.category_title, Category.category_id))
+        return {title.strip().lower(): category_id for title, category_id in result.all()}
+
+
+    @staticmethod
+    async def insert_books(db: AsyncSession, rows: List[dict]) -> List[int]:
+        """
+        Insert already-validated book rows in one INSERT ... RETURNING and
+        commit; returns the new book_ids in the order of `rows`.
+        """
+        if not rows:
+            return []
+        result = await db.execute(
+            insert(Book).returning(Book.book_id, sort_by_parameter_order=True),
+            rows,
+        )
+        book_ids = list(result.scalars())
+        await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+        return book_ids
+
+
     @staticmethod
     async def delete_book(db: AsyncSession, book_id: int) -> bool:
         result = await db.execute(select(Book).where(Book.book_id == book_id))
@@ -301,9 +493,11 @@ class BookCRUD:
         if not db_book:
             return False
 
-    
+        # Its borrow records cascade away; end the loans they held first
+        await BorrowCRUD.release_loans_for_book(db, book_id)
         await db.delete(db_book)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         return True
 
 
@@ -321,92 +515,193 @@ class BookCRUD:
 
 
     @staticmethod
-    async def rate_book(db: AsyncSession, book_id: int, user_id: int, rating: float):
-        # Fetch book
-        db_book = await db.get(Book, book_id)
+    async def rate_book(db: AsyncSession, book_id: int, user_id: str, rating: float):
+        """
+        Record a user's vote and fold it into the book's running aggregates in
+        the same transaction. Costs O(1) regardless of how many votes exist.
+        Returns None if the book does not exist.
+        """
+        result = await db.execute(
+            update(Book)
+            .where(Book.book_id == book_id)
+            .values(
+                rating_sum=Book.rating_sum + rating,
+                rating_count=Book.rating_count + 1,
+                book_rating=func.round((Book.rating_sum + rating) / (Book.rating_count + 1), 1),
+            )
+            .returning(Book)
+            .execution_options(populate_existing=True)
+        )
+        db_book = result.scalar_one_or_none()
         if not db_book:
+            await db.rollback()
             return None
 
-        # Add user rating record
-        user_rating = UserRating(user_id=user_id, book_id=book_id, rating=rating)
-        db.add(user_rating)
-        await db.flush()
+        db.add(UserRating(user_id=user_id, book_id=book_id, rating=rating))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # uix_user_book: undo the aggregate bump together with the vote
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="You have already rated this book")
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
 
-        # Recalculate average rating for that book
-        avg_query = select(func.avg(UserRating.rating)).where(UserRating.book_id == book_id)
-        avg_result = await db.execute(avg_query)
-        avg_rating = avg_result.scalar() or 0.0
+        return db_book
 
-        db_book.book_rating = round(avg_rating, 1)
-        db.add(db_book)
+
+    @staticmethod
+    async def reconcile_ratings(db: AsyncSession) -> int:
+        """
+        Recompute rating_sum/rating_count (and book_rating) from user_rating
+        for every book whose aggregates drifted. Returns the number of books fixed.
+        """
+        total = (
+            select(func.coalesce(func.sum(UserRating.rating), 0))
+            .where(UserRating.book_id == Book.book_id)
+            .scalar_subquery()
+        )
+        count = (
+            select(func.count())
+            .where(UserRating.book_id == Book.book_id)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(Book)
+            .where(or_(Book.rating_sum != total, Book.rating_count != count))
+            .values(
+                rating_sum=total,
+                rating_count=count,
+                book_rating=case((count > 0, func.round(total / count, 1)), else_=Book.book_rating),
+            )
+            .execution_options(synchronize_session=False)
+        )
         await db.commit()
-        await db.refresh(db_book)
-        return db_book
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+        return result.rowcount
 
 
 
 
 
     @staticmethod
-    async def get_books_by_category(db: AsyncSession, category_id: int, skip: int = 0, limit: int = 20):
-        result = await db.execute(
+    async def get_books_by_category(
+        db: AsyncSession,
+        category_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ):
+        stmt = (
             select(Book, Category.category_title)
             .join(Category, Category.category_id == Book.book_category_id)
             .where(Book.book_category_id == category_id)
-            .offset(skip)
-            .limit(limit)
         )
-        rows = result.all()
+        return await BookCRUD._keyset(db, stmt, CATALOG_ORDER, skip, limit, cursor)
+
+
+    @staticmethod
+    async def _ranked(db: AsyncSession, rank, skip: int, limit: int, cursor: Optional[str]):
+        """
+        Page books by a book_popularity column (highest first), walking its
+        (column, book_id) index. Books not ranked yet are left out until the
+        next refresh. Returns (books, next_cursor).
+        """
+        order = (rank, BookPopularity.book_id)
+        stmt = keyset(
+            select(Book, Category.category_title, rank)
+            .join(BookPopularity, BookPopularity.book_id == Book.book_id)
+            .join(Category, Category.category_id == Book.book_category_id),
+            order,
+            cursor,
+        )
+        if not cursor:
+            stmt = stmt.offset(skip)
+        result = await db.execute(stmt.limit(limit + 1))
+
         books = []
-        for book, category_title in rows:
+        for book, category_title, rank_value in result.all():
             book.category_title = category_title
+            book.rank_value = rank_value
             books.append(book)
-        return books
+        return keyset_page(books, limit, order, key=lambda book: (book.rank_value, book.book_id))
 
 
+    @staticmethod
+    async def get_popular_books(db: AsyncSession, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+        """Most popular books overall: decayed borrows, ratings and reviews."""
+        return await BookCRUD._ranked(db, BookPopularity.score, skip, limit, cursor)
+
 
+    @staticmethod
+    async def get_trending_books(db: AsyncSession, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+        """Books borrowed most recently, by decayed borrow count alone."""
+        return await BookCRUD._ranked(db, BookPopularity.heat, skip, limit, cursor)
 
 
     @staticmethod
-    async def get_featured_books(
+    def new_arrivals_window(
+        days: Optional[int] = None, month: Optional[str] = None
+    ) -> Tuple[datetime, Optional[datetime]]:
+        """
+        [start, end) in UTC for "new arrivals": a calendar month ("YYYY-MM"),
+        or today plus the `days` before it (NEW_BOOKS_DEFAULT_DAYS if
+        neither is given). end is None for an open-ended window.
+        """
+        if days is not None and month is not None:
+            raise validation_error({"month": "Pass either days or month, not both"})
+        if month is not None:
+            try:
+                start = datetime.strptime(month, "%Y-%m")
+            except ValueError:
+                raise validation_error({"month": "Expected YYYY-MM"})
+            return start, (start + timedelta(days=32)).replace(day=1)
+
+        # Whole days, so the result (and its ETag) only changes at midnight
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=settings.NEW_BOOKS_DEFAULT_DAYS if days is None else days), None
+
+
+    @staticmethod
+    async def get_new_books(
         db: AsyncSession,
         skip: int = 0,
         limit: int = 20,
-        search: Optional[str] = None
-    ) -> List[Book]:
+        cursor: Optional[str] = None,
+        days: Optional[int] = None,
+        month: Optional[str] = None,
+    ):
         """
-        Return featured books with optional search.
+        Return books added within the new-arrivals window, newest first.
+        A plain created_at range, so it walks ix_books_created_at_book_id.
         """
+        start, end = BookCRUD.new_arrivals_window(days, month)
         stmt = (
             select(Book, Category.category_title)
             .join(Category, Category.category_id == Book.book_category_id)
-            .where(Book.featured == True)  # only featured books
+            .where(Book.created_at >= start)
         )
+        if end is not None:
+            stmt = stmt.where(Book.created_at < end)
+        return await BookCRUD._keyset(db, stmt, NEW_ORDER, skip, limit, cursor)
 
-        if search is not None:
-            search = search.strip()
-            if search == "":
-                search = None
-
-        if search:
-            pattern = f"%{search}%"
-            stmt = stmt.where(
-                or_(
-                    Book.book_title.ilike(pattern),
-                    Book.book_author.ilike(pattern),
-                    Book.book_details.ilike(pattern),
-                )
-            )
 
-        stmt = stmt.offset(skip).limit(limit)
 
-        
-        result = await db.execute(stmt)
-        rows = result.all()
 
-        books = []
-        for book, category_title in rows:
-            book.category_title = category_title
-            books.append(book)
 
-        return books
\ No newline at end of file
+    @staticmethod
+    async def get_featured_books(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
+    ):
+        """
+        Return featured books with optional search. Returns (books, next_cursor).
+        """
+        stmt = (
+            select(Book, Category.category_title)
+            .join(Category, Category.category_id == Book.book_category_id)
+            .where(Book.featured == True)  # only featured books
+        )
+        return await BookCRUD._search(db, stmt, skip=skip, limit=limit, search=search, cursor=cursor)
@@ -0,0 +1,41 @@
+from dataclasses import asdict
+from typing import Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.book_import_job import BookImportJob
+
+
+class BookImportJobCRUD:
+
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: str) -> Optional[BookImportJob]:
+        return await db.get(BookImportJob, job_id)
+
+    @staticmethod
+    async def save(db: AsyncSession, job) -> None:
+        """Insert or overwrite the row for an in-progress ImportJob."""
+        values = asdict(job)
+        stmt = insert(BookImportJob).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BookImportJob.job_id],
+            set_={key: stmt.excluded[key] for key in values if key != "job_id"},
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    @staticmethod
+    async def prune(db: AsyncSession, keep: int) -> None:
+        """Drop all but the `keep` most recently started finished jobs."""
+        kept = (
+            select(BookImportJob.job_id)
+            .where(BookImportJob.status != "running")
+            .order_by(BookImportJob.started_at.desc())
+            .limit(keep)
+        )
+        await db.execute(
+            delete(BookImportJob).where(BookImportJob.status != "running", BookImportJob.job_id.not_in(kept))
+        )
+        await db.commit()
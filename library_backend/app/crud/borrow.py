@@ -1,19 +1,462 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import NoResultFound
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.cache_version import CATALOG_SCOPE
 from app.models.borrow import BorrowRecord
 from app.models.book import Book
 from app.models.user import User
-from app.schemas.borrow import BorrowCreate, BorrowStatusUpdate, BorrowDetailResponse
+from app.schemas.borrow import (
+    BorrowCreate, BorrowStatusUpdate, BorrowDetailResponse, BorrowFilter,
+    BorrowBatchItemResult, BorrowBatchResponse,
+)
 from fastapi import HTTPException, status
-from datetime import date, timedelta
-from app.crud.settings import SettingsCRUD  
-from sqlalchemy import func
+from datetime import date, datetime, timedelta
+from app.core.library_settings import library_settings
+from app.utils.minio_utils import presigned_download_url
+from sqlalchemy import func, update, and_, or_, exists, values, column, Integer, String
+from collections import Counter
+from types import SimpleNamespace
+from typing import List, Optional
+
+# Rows fetched per round trip when streaming exports
+STREAM_BATCH_SIZE = 1000
+
+# borrow_status values for which a (non-rejected) record holds a physical copy
+COPY_HOLDING_STATUSES = ("borrowed", "overdue")
+
+# Batch transitions: action -> (column changed, new value)
+BATCH_ACTIONS = {
+    "accept": ("request_status", "accepted"),
+    "reject": ("request_status", "rejected"),
+    "return": ("borrow_status", "returned"),
+}
+
+# Transaction-level advisory lock: only one API replica sweeps at a time
+OVERDUE_SWEEP_LOCK_KEY = 7_019_001
 
 
 
 class BorrowCRUD:
 
+    @staticmethod
+    def _detail_query():
+        """
+        Borrow rows joined with book title and user name, projecting only the
+        columns BorrowDetailResponse needs, so a whole list is one round trip.
+        """
+        return (
+            select(
+                BorrowRecord.borrow_id,
+                BorrowRecord.user_id,
+                User.user_name,
+                BorrowRecord.book_id,
+                Book.book_title,
+                BorrowRecord.borrow_date,
+                BorrowRecord.return_date,
+                BorrowRecord.borrow_status,
+                BorrowRecord.request_status,
+            )
+            .outerjoin(Book, Book.book_id == BorrowRecord.book_id)
+            .outerjoin(User, User.user_id == BorrowRecord.user_id)
+        )
+
+    @staticmethod
+    def _filter_conditions(filters: Optional[BorrowFilter]) -> list:
+        if not filters:
+            return []
+        conditions = []
+        if filters.user_id:
+            conditions.append(BorrowRecord.user_id == filters.user_id)
+        if filters.book_id is not None:
+            conditions.append(BorrowRecord.book_id == filters.book_id)
+        if filters.borrow_status:
+            conditions.append(BorrowRecord.borrow_status == filters.borrow_status)
+        if filters.request_status:
+            conditions.append(BorrowRecord.request_status == filters.request_status)
+        if filters.date_from:
+            conditions.append(BorrowRecord.borrow_date >= filters.date_from)
+        if filters.date_to:
+            conditions.append(BorrowRecord.borrow_date <= filters.date_to)
+        return conditions
+
+    @staticmethod
+    def _listing_query(conditions, filters: Optional[BorrowFilter] = None):
+        sort = filters.sort if filters else "borrow_id"
+        column = getattr(BorrowRecord, sort.lstrip("-"))
+        descending = sort.startswith("-")
+        order = [column.desc() if descending else column.asc()]
+        if column is not BorrowRecord.borrow_id:
+            # borrow_id breaks ties so pages never overlap
+            order.append(BorrowRecord.borrow_id.desc() if descending else BorrowRecord.borrow_id.asc())
+
+        return (
+            BorrowCRUD._detail_query()
+            .where(*conditions, *BorrowCRUD._filter_conditions(filters))
+            .order_by(*order)
+        )
+
+    @staticmethod
+    async def _list_details(
+        db: AsyncSession,
+        *conditions,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[BorrowDetailResponse]:
+        stmt = BorrowCRUD._listing_query(conditions, filters).offset(skip)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await db.execute(stmt)
+        return [BorrowDetailResponse(**row) for row in result.mappings()]
+
+    @staticmethod
+    def details_query(filters: Optional[BorrowFilter] = None):
+        """The admin listing's rows (same columns, filters and order), unpaged, for exports."""
+        return BorrowCRUD._listing_query((), filters)
+
+    @staticmethod
+    def export_query(since: Optional[datetime] = None):
+        """Borrow history joined with user and book, oldest change first, for exports."""
+        stmt = (
+            select(
+                BorrowRecord.borrow_id,
+                BorrowRecord.user_id,
+                User.user_name,
+                User.user_email,
+                BorrowRecord.book_id,
+                Book.book_title,
+                Book.book_author,
+                BorrowRecord.borrow_date,
+                BorrowRecord.return_date,
+                BorrowRecord.borrow_status,
+                BorrowRecord.request_status,
+                BorrowRecord.updated_at,
+            )
+            .outerjoin(Book, Book.book_id == BorrowRecord.book_id)
+            .outerjoin(User, User.user_id == BorrowRecord.user_id)
+            .order_by(BorrowRecord.updated_at, BorrowRecord.borrow_id)
+        )
+        if since is not None:
+            stmt = stmt.where(BorrowRecord.updated_at >= since)
+        return stmt
+
+    @staticmethod
+    async def _get_detail(db: AsyncSession, borrow_id: int) -> BorrowDetailResponse:
+        result = await db.execute(
+            BorrowCRUD._detail_query().where(BorrowRecord.borrow_id == borrow_id)
+        )
+        return BorrowDetailResponse(**result.mappings().one())
+
+    # ---- inventory & loans -----------------------------------------------
+    # A record that holds a copy is also one of the user's active loans, so
+    # books.book_count and users.active_loan_count always move together.
+
+    @staticmethod
+    def _holds_copy(db_borrow: BorrowRecord) -> bool:
+        """Whether a record currently keeps a physical copy off the shelf."""
+        return (
+            db_borrow.borrow_status in COPY_HOLDING_STATUSES
+            and db_borrow.request_status != "rejected"
+        )
+
+    @staticmethod
+    def _holding_clause():
+        """SQL form of _holds_copy."""
+        return and_(
+            BorrowRecord.borrow_status.in_(COPY_HOLDING_STATUSES),
+            or_(BorrowRecord.request_status.is_(None), BorrowRecord.request_status != "rejected"),
+        )
+
+    @staticmethod
+    def _take_copy(book_id: int, *conditions):
+        """
+        UPDATE taking one copy of a book. The row lock makes concurrent callers
+        queue, and Postgres re-checks `book_count > 0` against the latest row,
+        so the count can never go below zero.
+        """
+        return (
+            update(Book)
+            .where(Book.book_id == book_id, Book.book_count > 0, *conditions)
+            .values(
+                book_count=Book.book_count - 1,
+                book_availability=Book.book_count > 1,   # old value: was this the last copy?
+            )
+            .returning(Book.book_id, Book.book_availability)
+        )
+
+    @staticmethod
+    async def _reserve_loan_and_copy(db: AsyncSession, user_id: str, book_id: int, max_loans: int):
+        """
+        In one statement: count a new loan for the user if they are under
+        `max_loans`, and only then take a copy. Returns (loan_ok, copy_ok,
+        last_copy), last_copy meaning the book is now unavailable.
+        If either failed the caller must roll back, since the loan bump may
+        have been applied without a copy.
+        """
+        loan = (
+            update(User)
+            .where(User.user_id == user_id, User.active_loan_count < max_loans)
+            .values(active_loan_count=User.active_loan_count + 1)
+            .returning(User.user_id)
+            .cte("loan")
+        )
+        copy = BorrowCRUD._take_copy(book_id, exists(select(loan.c.user_id))).cte("copy")
+        result = await db.execute(
+            select(
+                exists(select(loan.c.user_id)).label("loan_ok"),
+                exists(select(copy.c.book_id)).label("copy_ok"),
+                exists(select(copy.c.book_id).where(copy.c.book_availability.is_(False))).label("last_copy"),
+            )
+        )
+        row = result.one()
+        return row.loan_ok, row.copy_ok, row.last_copy
+
+    @staticmethod
+    async def _reserve(db: AsyncSession, db_borrow: BorrowRecord) -> bool:
+        """
+        Re-activate a record (e.g. a rejected request accepted after all).
+        Returns whether that took the last copy.
+        """
+        # Users before books, the same lock order as create_borrow
+        await db.execute(
+            update(User)
+            .where(User.user_id == db_borrow.user_id)
+            .values(active_loan_count=User.active_loan_count + 1)
+
+            .execution_options(synchronize_session=False)
+        )
+        taken = (await db.execute(BorrowCRUD._take_copy(db_borrow.book_id))).one_or_none()
+        if taken is None:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="BOOK_UNAVAILABLE")
+        return not taken.book_availability
+
+    @staticmethod
+    async def _release(db: AsyncSession, db_borrow: BorrowRecord) -> bool:
+        """
+        End the user's loan and give the copy back (users before books, as in
+        _reserve). Returns whether the book was out of copies until now.
+        """
+        await db.execute(
+            update(User)
+            .where(User.user_id == db_borrow.user_id)
+            .values(active_loan_count=func.greatest(User.active_loan_count - 1, 0))
+
+            .execution_options(synchronize_session=False)
+        )
+        count = (await db.execute(
+            update(Book)
+            .where(Book.book_id == db_borrow.book_id)
+            .values(book_count=func.coalesce(Book.book_count, 0) + 1, book_availability=True)
+            .returning(Book.book_count)
+            .execution_options(synchronize_session=False)
+        )).scalar_one_or_none()
+        return count == 1
+
+    @staticmethod
+    async def _lock_borrow(db: AsyncSession, borrow_id: int) -> BorrowRecord:
+        result = await db.execute(
+            select(BorrowRecord)
+            .where(BorrowRecord.borrow_id == borrow_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        db_borrow = result.scalar_one_or_none()
+        if not db_borrow:
+            raise HTTPException(status_code=404, detail="BORROW_NOT_FOUND")
+        return db_borrow
+
+    @staticmethod
+    async def _apply_hold_change(db: AsyncSession, db_borrow: BorrowRecord, held_before: bool) -> bool:
+        """
+        Take or give back copy and loan when a status change flips whether
+        the record holds one. Returns whether the book's availability flipped.
+        """
+        held_after = BorrowCRUD._holds_copy(db_borrow)
+        if held_before and not held_after:
+            return await BorrowCRUD._release(db, db_borrow)
+        if held_after and not held_before:
+            return await BorrowCRUD._reserve(db, db_borrow)
+        return False
+
+    @staticmethod
+    async def release_loans_for_book(db: AsyncSession, book_id: int) -> None:
+        """
+        End the active loans on a book about to be deleted (its borrow records
+        go with it via ON DELETE CASCADE). Does not commit.
+        """
+        held = (
+            select(BorrowRecord.user_id, func.count().label("loans"))
+            .where(BorrowRecord.book_id == book_id, BorrowCRUD._holding_clause())
+            .group_by(BorrowRecord.user_id)
+            .subquery()
+        )
+        await db.execute(
+            update(User)
+            .where(User.user_id == held.c.user_id)
+            .values(active_loan_count=func.greatest(User.active_loan_count - held.c.loans, 0))
+
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def reconcile_loan_counts(db: AsyncSession) -> int:
+        """
+        Recompute users.active_loan_count from borrow_records for every user
+        whose counter drifted. Returns the number of users fixed.
+        """
+        actual = (
+            select(func.count())
+            .where(BorrowRecord.user_id == User.user_id, BorrowCRUD._holding_clause())
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(User)
+            .where(User.active_loan_count != actual)
+            .values(active_loan_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _batch_check(action: str, db_borrow) -> Optional[str]:
+        """Why `action` can't apply to this record, or None if it can."""
+        if action in ("accept", "reject"):
+            if db_borrow.request_status != "pending":
+                return "REQUEST_NOT_PENDING"
+        elif db_borrow.borrow_status not in COPY_HOLDING_STATUSES or db_borrow.request_status != "accepted":
+            return "NOT_ON_LOAN"
+        return None
+
+    @staticmethod
+    async def batch_transition(db: AsyncSession, borrow_ids: List[int], action: str) -> BorrowBatchResponse:
+        """
+        Apply accept / reject / return to many borrows in one transaction:
+        one locking read, one UPDATE of the records, and one UPDATE each for
+        users and books (in that order, like create_borrow) with the
+        loans/copies released aggregated per row.
+        Records that can't take the transition are reported, not failed.
+        """
+        field, new_value = BATCH_ACTIONS[action]
+        borrow_ids = list(dict.fromkeys(borrow_ids))
+
+        result = await db.execute(
+            select(
+                BorrowRecord.borrow_id,
+                BorrowRecord.user_id,
+                BorrowRecord.book_id,
+                BorrowRecord.borrow_status,
+                BorrowRecord.request_status,
+            )
+            .where(BorrowRecord.borrow_id.in_(borrow_ids))
+            .order_by(BorrowRecord.borrow_id)   # consistent lock order across batches
+            .with_for_update()
+        )
+        found = {row.borrow_id: row for row in result.all()}
+
+        results = {}
+        changed = []
+        copies, loans = Counter(), Counter()
+        for borrow_id in borrow_ids:
+            row = found.get(borrow_id)
+            reason = "BORROW_NOT_FOUND" if row is None else BorrowCRUD._batch_check(action, row)
+            if reason:
+                results[borrow_id] = BorrowBatchItemResult(
+                    borrow_id=borrow_id, ok=False, detail=reason,
+                    borrow_status=row.borrow_status if row else None,
+                    request_status=row.request_status if row else None,
+                )
+                continue
+
+            state = {"borrow_status": row.borrow_status, "request_status": row.request_status, field: new_value}
+            # Accepting keeps the copy taken at request time; reject/return give it back
+            if BorrowCRUD._holds_copy(row) and not BorrowCRUD._holds_copy(SimpleNamespace(**state)):
+                copies[row.book_id] += 1
+                loans[row.user_id] += 1
+            changed.append(borrow_id)
+            results[borrow_id] = BorrowBatchItemResult(borrow_id=borrow_id, ok=True, **state)
+
+        if changed:
+            await db.execute(
+                update(BorrowRecord)
+                .where(BorrowRecord.borrow_id.in_(changed))
+                .values({field: new_value})
+                .execution_options(synchronize_session=False)
+            )
+        if loans:
+            ended = values(column("user_id", String), column("n", Integer), name="ended").data(
+                sorted(loans.items())
+            )
+            await db.execute(
+                update(User)
+                .where(User.user_id == ended.c.user_id)
+                .values(active_loan_count=func.greatest(User.active_loan_count - ended.c.n, 0))
+                .execution_options(synchronize_session=False)
+            )
+        restocked = False
+        if copies:
+            released = values(column("book_id", Integer), column("n", Integer), name="released").data(
+                sorted(copies.items())
+            )
+            result = await db.execute(
+                update(Book)
+                .where(Book.book_id == released.c.book_id)
+                .values(book_count=func.coalesce(Book.book_count, 0) + released.c.n, book_availability=True)
+                .returning(Book.book_count == released.c.n)   # had no copies left before
+                .execution_options(synchronize_session=False)
+            )
+            restocked = any(result.scalars())
+        await db.commit()
+        if restocked:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+
+        return BorrowBatchResponse(
+            succeeded=len(changed),
+            failed=len(borrow_ids) - len(changed),
+            results=[results[borrow_id] for borrow_id in borrow_ids],
+        )
+
+
+    @staticmethod
+    async def mark_overdue(db: AsyncSession, today: date, batch_size: int) -> Optional[int]:
+        """
+        Flip accepted loans past their return_date from 'borrowed' to
+        'overdue', `batch_size` rows per transaction (walking the partial
+        return_date index) so locks stay short. Returns rows changed, or None
+        if another replica holds the sweep lock.
+        """
+        total = 0
+        while True:
+            locked = await db.execute(select(func.pg_try_advisory_xact_lock(OVERDUE_SWEEP_LOCK_KEY)))
+            if not locked.scalar_one():
+                await db.rollback()
+                return None if total == 0 else total
+
+            due = (
+                select(BorrowRecord.borrow_id)
+                .where(
+                    BorrowRecord.borrow_status == "borrowed",
+                    BorrowRecord.request_status == "accepted",
+                    BorrowRecord.return_date < today,
+                )
+                .order_by(BorrowRecord.return_date)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)   # rows being changed by a request are left for next run
+            )
+            result = await db.execute(
+                update(BorrowRecord)
+                .where(BorrowRecord.borrow_id.in_(due.scalar_subquery()))
+                .values(borrow_status="overdue")
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
+
     @staticmethod
     async def get_borrow(db: AsyncSession, borrow_id: int) -> BorrowRecord:
         borrow = await db.get(BorrowRecord, borrow_id)
@@ -66,6 +509,9 @@ class BorrowCRUD:
         db.add(db_borrow)
         await db.commit()
         await db.refresh(db_borrow)
+
+        # Hand out an expiring link so the PDF is served by storage, not the API
+        db_borrow.pdf_url = presigned_download_url(book.book_pdf)
         return db_borrow
 
 
@@ -73,17 +519,20 @@ class BorrowCRUD:
 
     @staticmethod
     async def create_borrow(db: AsyncSession, borrow: BorrowCreate, user: User):
-        # Get book
-        book = await db.get(Book, borrow.book_id)
-        if not book:
-            raise HTTPException(status_code=404, detail="BOOK_NOT_FOUND")
-
-        # Validate availability
-        if not book.book_availability:
+        # Take a loan slot and a copy first, in one statement: the conditional
+        # UPDATEs are the only limit/availability checks, so concurrent
+        # requests can neither oversell the last copy nor exceed the limit.
+        max_loans = await library_settings.borrow_max_limit()
+        loan_ok, copy_ok, last_copy = await BorrowCRUD._reserve_loan_and_copy(db, user.user_id, borrow.book_id, max_loans)
+        if not (loan_ok and copy_ok):
+            await db.rollback()
+            if not loan_ok:
+                raise HTTPException(status_code=409, detail=f"BORROW_LIMIT_REACHED: at most {max_loans} active borrows")
+            if not await db.get(Book, borrow.book_id):
+                raise HTTPException(status_code=404, detail="BOOK_NOT_FOUND")
             raise HTTPException(status_code=409, detail="BOOK_UNAVAILABLE")
 
-        borrow_day_limit = await SettingsCRUD.get_borrow_day_limit(db)
-        borrow_day_limit = borrow_day_limit if borrow_day_limit is not None else 14
+        borrow_day_limit = await library_settings.borrow_day_limit()
 
         # Borrow/Return dates auto-set
         borrow_date = date.today()
@@ -93,131 +542,84 @@ class BorrowCRUD:
         db_borrow = BorrowRecord(
             user_id=user.user_id,
             #user_name=user.user_name,   
-            book_id=book.book_id,
+            book_id=borrow.book_id,
             #book_title=book.book_title,      
             borrow_date=borrow_date,
             return_date=return_date,
             borrow_status="borrowed",
             request_status="pending",
         )
-
-        print("all info: ", db_borrow)
-      
         db.add(db_borrow)
 
-# --- Update book availability based on count ---
-# Decrease the count of available copies
-        if book.book_count is not None and book.book_count > 0:
-            book.book_count -= 1
-
-# If no copies left, mark as unavailable
-        if book.book_count == 0:
-            book.book_availability = False
-        else:
-            book.book_availability = True  # remains available if count > 0
-
-        db.add(book)
-
         await db.commit()
+        if last_copy:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(db_borrow)
         return db_borrow
 
 
 
     @staticmethod
-    async def list_by_borrow_status(db: AsyncSession, status: str):
+    async def list_by_borrow_status(
+        db: AsyncSession,
+        status: str,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
         """
         Get detailed list of borrows filtered by borrow_status.
         """
-        result = await db.execute(
-            select(BorrowRecord).where(BorrowRecord.borrow_status == status)
+        return await BorrowCRUD._list_details(
+            db, BorrowRecord.borrow_status == status, filters=filters, skip=skip, limit=limit
         )
-        borrows = result.scalars().all()
-
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-        
-        print("Borrowes      ::: ",borrows)
-
-        return borrows
-
-
-
-
 
 
     @staticmethod
-    async def list_by_request_status(db: AsyncSession, status: str):
+    async def list_by_request_status(
+        db: AsyncSession,
+        status: str,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
         """
         Get detailed list of borrows filtered by request_status.
         """
-        result = await db.execute(
-            select(BorrowRecord).where(BorrowRecord.request_status == status)
+        return await BorrowCRUD._list_details(
+            db, BorrowRecord.request_status == status, filters=filters, skip=skip, limit=limit
         )
-        borrows = result.scalars().all()
-
-
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-
-        return borrows
-
-
 
 
     @staticmethod
-    async def get_all_borrows_admin(db: AsyncSession):
+    async def get_all_borrows_admin(
+        db: AsyncSession,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
         """
-        Admin: Get all borrow records for all users with book & user details.
+        Admin: Get borrow records for all users with book & user details.
         """
-        result = await db.execute(select(BorrowRecord))
-        borrows = result.scalars().all()
-
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-
-        return borrows
-
-
-
-
-
+        return await BorrowCRUD._list_details(db, filters=filters, skip=skip, limit=limit)
 
 
     @staticmethod
-    async def get_my_borrow(db: AsyncSession, user_id: str):
+    async def get_my_borrow(
+        db: AsyncSession,
+        user_id: str,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
         """
-        Get all borrow records for a specific user with book/user details.
+        Get borrow records for a specific user with book/user details.
         """
-        result = await db.execute(
-            select(BorrowRecord).where(BorrowRecord.user_id == user_id)
+        return await BorrowCRUD._list_details(
+            db, BorrowRecord.user_id == user_id, filters=filters, skip=skip, limit=limit
         )
-        borrows = result.scalars().all()
-
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-
-        return borrows
 
 
-
-    
     @staticmethod
     async def count_my_borrow_status(db: AsyncSession, user_id: str, status: str) -> int:
         """
@@ -254,42 +656,20 @@ class BorrowCRUD:
 
     @staticmethod
     async def update_borrow_status(db: AsyncSession, borrow_id: int, status: str):
-
-
-        db_borrow = await db.get(BorrowRecord, borrow_id)
-        if not db_borrow:
-            raise HTTPException(status_code=404, detail="BORROW_NOT_FOUND")
+        db_borrow = await BorrowCRUD._lock_borrow(db, borrow_id)
+        held = BorrowCRUD._holds_copy(db_borrow)
 
         # Update status
         db_borrow.borrow_status = status
 
-        # If returned, make book available and increment count
-        if status == "returned":
-            book = await db.get(Book, db_borrow.book_id)
-            if book:
-                book.book_availability = True
-                book.book_count = (book.book_count or 0) + 1
-                db.add(book)
-
-        db.add(db_borrow)
+        # e.g. returned -> copy back to the shelf, loan ended
+        flipped = await BorrowCRUD._apply_hold_change(db, db_borrow, held)
         await db.commit()
-        await db.refresh(db_borrow)
+        if flipped:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
 
     # Fetch related user and book for response
-        user = await db.get(User, db_borrow.user_id)
-        book = await db.get(Book, db_borrow.book_id)
-
-        return BorrowDetailResponse(
-            borrow_id=db_borrow.borrow_id,
-            user_id=db_borrow.user_id,
-            user_name=user.user_name if user else None,
-            book_id=db_borrow.book_id,
-            book_title=book.book_title if book else None,
-            borrow_date=db_borrow.borrow_date,
-            return_date=db_borrow.return_date,
-            borrow_status=db_borrow.borrow_status,
-            request_status=db_borrow.request_status,
-        )
+        return await BorrowCRUD._get_detail(db, db_borrow.borrow_id)
     
 
 
@@ -298,42 +678,20 @@ class BorrowCRUD:
 
     @staticmethod
     async def update_borrow_request_status(db: AsyncSession, borrow_id: int, status: str):
+        db_borrow = await BorrowCRUD._lock_borrow(db, borrow_id)
+        held = BorrowCRUD._holds_copy(db_borrow)
 
-
-        db_borrow = await db.get(BorrowRecord, borrow_id)
-        if not db_borrow:
-            raise HTTPException(status_code=404, detail="BORROW_NOT_FOUND")
-
-        # Update status
+        # Update status. The copy was taken when the request was made, so
+        # accepting changes nothing; rejecting gives it back.
         db_borrow.request_status = status
 
-        # If returned, make book available and increment count
-        if status == "accepted":
-            book = await db.get(Book, db_borrow.book_id)
-            if book:
-                book.book_availability = True
-                book.book_count = (book.book_count or 0) - 1
-                db.add(book)
-
-        db.add(db_borrow)
+        flipped = await BorrowCRUD._apply_hold_change(db, db_borrow, held)
         await db.commit()
-        await db.refresh(db_borrow)
+        if flipped:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
 
     # Fetch related user and book for response
-        user = await db.get(User, db_borrow.user_id)
-        book = await db.get(Book, db_borrow.book_id)
-
-        return BorrowDetailResponse(
-            borrow_id=db_borrow.borrow_id,
-            user_id=db_borrow.user_id,
-            user_name=user.user_name if user else None,
-            book_id=db_borrow.book_id,
-            book_title=book.book_title if book else None,
-            borrow_date=db_borrow.borrow_date,
-            return_date=db_borrow.return_date,
-            borrow_status=db_borrow.borrow_status,
-            request_status=db_borrow.request_status,
-        )
+        return await BorrowCRUD._get_detail(db, db_borrow.borrow_id)
 
 
 
@@ -344,40 +702,35 @@ class BorrowCRUD:
 
     @staticmethod
     async def delete_borrow(db: AsyncSession, db_borrow: BorrowRecord):
+        # Re-read under lock so a concurrent status change can't release twice
+        db_borrow = await BorrowCRUD._lock_borrow(db, db_borrow.borrow_id)
+
         # If deleting an active borrow, free the book
-        if db_borrow.borrow_status == "borrowed":
-            book = await db.get(Book, db_borrow.book_id)
-            if book:
-                book.book_availability = True
-                db.add(book)
+        flipped = BorrowCRUD._holds_copy(db_borrow) and await BorrowCRUD._release(db, db_borrow)
 
         await db.delete(db_borrow)
         await db.commit()
+        if flipped:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         return True
 
 
            
     @staticmethod
-    async def list_my_borrow_status(db: AsyncSession, status: str, user_id: str = None):
+    async def list_my_borrow_status(
+        db: AsyncSession,
+        status: str,
+        user_id: str = None,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
     
-        query = select(BorrowRecord).where(BorrowRecord.borrow_status == status)
-
+        conditions = [BorrowRecord.borrow_status == status]
         if user_id:
-            query = query.where(BorrowRecord.user_id == user_id)
-
-        result = await db.execute(query)
-        borrows = result.scalars().all()
-
-    # Add book_title and user_name
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-
-        return borrows
+            conditions.append(BorrowRecord.user_id == user_id)
 
+        return await BorrowCRUD._list_details(db, *conditions, filters=filters, skip=skip, limit=limit)
 
 
     @staticmethod
@@ -394,37 +747,17 @@ class BorrowCRUD:
 
 
     @staticmethod
-    async def list_my_request_status(db: AsyncSession, status: str, user_id: str = None):
+    async def list_my_request_status(
+        db: AsyncSession,
+        status: str,
+        user_id: str = None,
+        filters: Optional[BorrowFilter] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+    ):
     
-        query = select(BorrowRecord).where(BorrowRecord.request_status == status)
-
+        conditions = [BorrowRecord.request_status == status]
         if user_id:
-            query = query.where(BorrowRecord.user_id == user_id)
-
-        result = await db.execute(query)
-        borrows = result.scalars().all()
-
-        for borrow in borrows:
-            book = await db.get(Book, borrow.book_id)
-            borrow.book_title = book.book_title if book else None
-
-            user = await db.get(User, borrow.user_id)
-            borrow.user_name = user.user_name if user else None
-
-        return borrows
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+            conditions.append(BorrowRecord.user_id == user_id)
 
+        return await BorrowCRUD._list_details(db, *conditions, filters=filters, skip=skip, limit=limit)
@@ -0,0 +1,40 @@
+import logging
+
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.cache_version import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+
+class CacheVersionCRUD:
+
+    @staticmethod
+    async def get(db: AsyncSession, scope: str):
+        """(version, updated_at) for a scope, or None if it has no row."""
+        result = await db.execute(
+            select(CacheVersion.version, CacheVersion.updated_at).where(CacheVersion.scope == scope)
+        )
+        return result.one_or_none()
+
+    @staticmethod
+    async def bump(db: AsyncSession, *scopes: str) -> None:
+        """
+        Invalidate cached responses for `scopes`. Call right after the commit
+        of the change it describes: the bump is its own one-statement
+        transaction, so the scope row is locked only for that UPDATE and
+        writers don't queue behind each other for their whole transaction.
+        A failed bump is logged, not raised; the change itself is already
+        committed and the next bump invalidates it.
+        """
+        try:
+            await db.execute(
+                update(CacheVersion)
+                .where(CacheVersion.scope.in_(scopes))
+                .values(version=CacheVersion.version + 1, updated_at=func.now())
+            )
+            await db.commit()
+        except SQLAlchemyError:
+            await db.rollback()
+            logger.warning("Could not bump cache version for %s", scopes, exc_info=True)
@@ -1,5 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.cache_version import CATALOG_SCOPE
 from app.models.category import Category
 from app.models.book import Book
 from app.schemas.category import CategoryCreate, CategoryUpdate
@@ -21,6 +23,7 @@ class CategoryCRUD:
         db_category = Category(**category.dict())
         db.add(db_category)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(db_category)
         return db_category
 
@@ -40,6 +43,7 @@ class CategoryCRUD:
 
         db.add(db_category)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(db_category)
         print(db_category)
         return db_category
@@ -62,4 +66,5 @@ class CategoryCRUD:
 
         await db.delete(db_category)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         return True
\ No newline at end of file
@@ -1,6 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException
+from typing import Optional
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.cache_version import CATALOG_SCOPE
 from app.models.donation_book import DonationBook
 from app.models.book import Book
 from app.models.category import Category
@@ -29,6 +32,35 @@ class DonationBookCRUD:
         return db_obj
 
 
+    @staticmethod
+    async def get_pending(db: AsyncSession, d_book_id: int, owner_email: Optional[str] = None):
+        """
+        A donation request that is still pending, or None. With owner_email,
+        only the donor who submitted it (BS_mail) may see it (403 otherwise).
+        """
+        donation = await db.get(DonationBook, d_book_id)
+        if not donation or donation.book_approve != "pending":
+            return None
+        if owner_email is not None and donation.BS_mail != owner_email:
+            raise HTTPException(status_code=403, detail="FORBIDDEN")
+        return donation
+
+
+    @staticmethod
+    async def set_media(db: AsyncSession, d_book_id: int, field: str, url: str, owner_email: Optional[str] = None):
+        """
+        Attach an uploaded object to a donation request that is still pending.
+        With owner_email, only the donor who submitted it (BS_mail) may do so.
+        Returns None if no such pending request exists.
+        """
+        donation = await DonationBookCRUD.get_pending(db, d_book_id, owner_email)
+        if not donation:
+            return None
+        setattr(donation, field, url)
+        await db.commit()
+        return donation
+
+
     @staticmethod
     async def get_by_status(db: AsyncSession, status: str):
         result = await db.execute(select(DonationBook).where(DonationBook.book_approve == status))
@@ -59,6 +91,7 @@ class DonationBookCRUD:
         )
         db.add(new_book)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(donation)
         return donation
 
@@ -90,6 +123,7 @@ class DonationBookCRUD:
         )
         db.add(new_book)
         await db.commit()
+        await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
         await db.refresh(donation)
         return donation
 
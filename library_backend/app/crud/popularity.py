@@ -0,0 +1,172 @@
+import math
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, insert, func, cast, literal, or_, true, Date, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.book import Book
+from app.models.borrow import BorrowRecord
+from app.models.cache_version import CATALOG_SCOPE
+from app.models.popularity import BookPopularity, RankingWatermark, POPULARITY_WATERMARK
+
+# Heat is measured in days since this date; fixed forever (see BookPopularity)
+POPULARITY_EPOCH = date(2024, 1, 1)
+
+# A new book starts as if borrowed this many times when it was added,
+# so fresh titles get a short spell in the trending list
+NEW_BOOK_PRIOR_BORROWS = 0.5
+
+# Bayesian rating prior: a book with few votes is pulled towards this mean
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_VOTES = 5
+
+# Book changes are picked up by books.updated_at, and new borrows are only
+# folded in once this old; the overlap covers transactions still in flight
+# when a refresh runs
+UPDATED_AT_OVERLAP = timedelta(minutes=1)
+
+# Transaction-level advisory lock: only one API replica refreshes at a time
+POPULARITY_REFRESH_LOCK_KEY = 7_023_001
+
+
+def _decay_rate() -> float:
+    """Per-day decay rate for the configured half-life."""
+    return math.log(2) / settings.POPULARITY_HALF_LIFE_DAYS
+
+
+def _days_since_epoch(column):
+    return func.extract("epoch", column - literal(datetime.combine(POPULARITY_EPOCH, datetime.min.time()))) / 86400.0
+
+
+def _logaddexp(a, b):
+    """ln(exp(a) + exp(b)) without overflowing."""
+    return func.greatest(a, b) + func.ln(1 + func.exp(-func.abs(a - b)))
+
+
+class PopularityCRUD:
+
+    @staticmethod
+    def _score(heat):
+        """Heat plus rating and review bonuses, all on the log scale."""
+        bayes_rating = (
+            (cast(Book.rating_sum, Float) + RATING_PRIOR_MEAN * RATING_PRIOR_VOTES)
+            / cast(Book.rating_count + RATING_PRIOR_VOTES, Float)
+        )
+        reviews = func.coalesce(Book.book_review_count, 0)
+        return heat + func.ln(1 + bayes_rating) + func.ln(1 + func.ln(1 + reviews))
+
+    @staticmethod
+    async def refresh(db: AsyncSession, full: bool = False) -> Optional[dict]:
+        """
+        Bring book_popularity up to date in one transaction:
+
+          1. add rows for books that have none, seeded with the new-book prior,
+          2. fold borrows past the borrow_id watermark into heat (logaddexp
+             of the per-book logsumexp of their decay weights), up to the
+             last one older than UPDATED_AT_OVERLAP,
+          3. recompute score where heat changed or the book changed since
+             the last refresh (ratings, reviews).
+
+        `full` drops everything and replays all borrows; needed after
+        changing POPULARITY_HALF_LIFE_DAYS. Returns counts, or None if
+        another replica is refreshing.
+        """
+        locked = await db.execute(select(func.pg_try_advisory_xact_lock(POPULARITY_REFRESH_LOCK_KEY)))
+        if not locked.scalar_one():
+            await db.rollback()
+            return None
+
+        watermark = (await db.execute(
+            select(RankingWatermark).where(RankingWatermark.name == POPULARITY_WATERMARK).with_for_update()
+        )).scalar_one()
+        if full:
+            await db.execute(delete(BookPopularity))
+            watermark.last_id, watermark.refreshed_at = 0, None
+
+        rate = _decay_rate()
+        now = func.now()   # transaction start: marks every row touched by this refresh
+
+        # 1. Books without a ranking row yet
+        seeded = select(
+            Book.book_id,
+            math.log(NEW_BOOK_PRIOR_BORROWS) + rate * _days_since_epoch(func.coalesce(Book.created_at, func.localtimestamp())),
+            literal(0.0),
+        ).where(~select(BookPopularity.book_id).where(BookPopularity.book_id == Book.book_id).exists())
+        added = await db.execute(
+            insert(BookPopularity).from_select(["book_id", "heat", "score"], seeded, include_defaults=False)
+        )
+
+        # 2. New borrows, folded in per book. Ids are handed out before
+        # commit, so a borrow still in flight can have a lower id than one
+        # already visible; only go up to rows older than the overlap so it
+        # isn't passed over for good.
+        high = (await db.execute(
+            select(func.coalesce(func.max(BorrowRecord.borrow_id), watermark.last_id)).where(
+                BorrowRecord.borrow_id > watermark.last_id,
+                BorrowRecord.updated_at < now - UPDATED_AT_OVERLAP,
+            )
+        )).scalar_one()
+        weights = (
+            select(
+                BorrowRecord.book_id,
+                (rate * (BorrowRecord.borrow_date - cast(literal(POPULARITY_EPOCH), Date))).label("x"),
+            )
+            .where(
+                BorrowRecord.borrow_id > watermark.last_id,
+                BorrowRecord.borrow_id <= high,
+                BorrowRecord.borrow_date.is_not(None),
+            )
+            .subquery()
+        )
+        peaks = select(
+            weights.c.book_id, weights.c.x, func.max(weights.c.x).over(partition_by=weights.c.book_id).label("m")
+        ).subquery()
+        delta = (
+            select(
+                peaks.c.book_id,
+                (peaks.c.m + func.ln(func.sum(func.exp(peaks.c.x - peaks.c.m)))).label("heat"),
+                func.count().label("n"),
+            )
+            .group_by(peaks.c.book_id, peaks.c.m)
+            .subquery()
+        )
+        borrowed = await db.execute(
+            update(BookPopularity)
+            .where(BookPopularity.book_id == delta.c.book_id)
+            .values(
+                heat=_logaddexp(BookPopularity.heat, delta.c.heat),
+                borrow_count=BookPopularity.borrow_count + delta.c.n,
+                refreshed_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # 3. Scores for everything touched above or edited since last time
+        changed = true()
+        if watermark.refreshed_at is not None:
+            changed = or_(
+                BookPopularity.refreshed_at == now,
+                Book.updated_at >= watermark.refreshed_at - UPDATED_AT_OVERLAP,
+            )
+        scored = await db.execute(
+            update(BookPopularity)
+            .where(BookPopularity.book_id == Book.book_id, changed)
+            .values(score=PopularityCRUD._score(BookPopularity.heat), refreshed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        watermark.last_id = high
+        watermark.refreshed_at = now
+        await db.commit()
+        if scored.rowcount:
+            await CacheVersionCRUD.bump(db, CATALOG_SCOPE)
+
+        return {
+            "books_added": added.rowcount,
+            "books_borrowed": borrowed.rowcount,
+            "scores_updated": scored.rowcount,
+            "last_borrow_id": high,
+        }
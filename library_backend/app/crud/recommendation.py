@@ -0,0 +1,138 @@
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete, insert, func, cast, literal, union_all, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.book import BookCRUD
+from app.models.book import Book
+from app.models.borrow import BorrowRecord
+from app.models.category import Category
+from app.models.popularity import BookPopularity
+from app.models.recommendation import UserRecommendation
+from app.models.user_rating import UserRating
+
+# Rows fetched per round trip when streaming interactions to the builder
+INTERACTION_BATCH_SIZE = 10000
+
+# Rows per INSERT when storing a rebuilt set of recommendations
+WRITE_BATCH_SIZE = 1000
+
+# A rating counts (r - 2.5) / 2.5 on top of the borrow: 5 stars doubles the
+# signal (2.0), 1 star cuts it to 0.4. A rating without a borrow only counts
+# above the midpoint (pairs weighing 0 or less are dropped)
+RATING_MIDPOINT = 2.5
+
+
+class RecommendationCRUD:
+
+    @staticmethod
+    async def stream_interactions(db: AsyncSession) -> AsyncIterator[Tuple[str, int, float]]:
+        """
+        (user_id, book_id, weight) per user/book pair with positive interest:
+        1 for having borrowed it, plus the rating adjustment.
+        """
+        borrows = select(
+            BorrowRecord.user_id, BorrowRecord.book_id, literal(1.0, Float).label("weight")
+        ).distinct()
+        ratings = select(
+            UserRating.user_id,
+            UserRating.book_id,
+            ((cast(UserRating.rating, Float) - RATING_MIDPOINT) / RATING_MIDPOINT).label("weight"),
+        )
+        signals = union_all(borrows, ratings).subquery()
+        weight = func.sum(signals.c.weight)
+        stmt = (
+            select(signals.c.user_id, signals.c.book_id, weight)
+            .where(signals.c.user_id.is_not(None), signals.c.book_id.is_not(None))
+            .group_by(signals.c.user_id, signals.c.book_id)
+            .having(weight > 0)
+            .execution_options(yield_per=INTERACTION_BATCH_SIZE)
+        )
+        result = await db.stream(stmt)
+        async for user_id, book_id, weight in result:
+            yield user_id, book_id, weight
+
+    @staticmethod
+    async def replace_all(db: AsyncSession, rows: Iterable[dict]) -> int:
+        """
+        Swap in a freshly built set of recommendations in one transaction;
+        readers keep seeing the previous set until the commit.
+        """
+        await db.execute(delete(UserRecommendation))
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                await db.execute(insert(UserRecommendation), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            await db.execute(insert(UserRecommendation), batch)
+            written += len(batch)
+        await db.commit()
+        return written
+
+    @staticmethod
+    async def _books(db: AsyncSession, stmt) -> List[Book]:
+        result = await db.execute(stmt)
+        return BookCRUD._attach_category(result.all())
+
+    @staticmethod
+    def _book_query():
+        return select(Book, Category.category_title).join(Category, Category.category_id == Book.book_category_id)
+
+    @staticmethod
+    async def _cold_start(db: AsyncSession, user_id: str, limit: int) -> List[Book]:
+        """
+        Most popular books the user hasn't borrowed, from the categories they
+        have borrowed from first, then from the whole catalog.
+        """
+        # NOT IN with a NULL in the list matches nothing
+        seen = select(BorrowRecord.book_id).where(
+            BorrowRecord.user_id == user_id, BorrowRecord.book_id.is_not(None)
+        )
+        liked_categories = (
+            select(Book.book_category_id)
+            .join(BorrowRecord, BorrowRecord.book_id == Book.book_id)
+            .where(BorrowRecord.user_id == user_id)
+        )
+        ranked = (
+            RecommendationCRUD._book_query()
+            .join(BookPopularity, BookPopularity.book_id == Book.book_id)
+            .where(Book.book_id.not_in(seen))
+            .order_by(BookPopularity.score.desc(), BookPopularity.book_id.desc())
+        )
+
+        books = await RecommendationCRUD._books(
+            db, ranked.where(Book.book_category_id.in_(liked_categories)).limit(limit)
+        )
+        if len(books) < limit:
+            picked = [book.book_id for book in books]
+            books += await RecommendationCRUD._books(
+                db, ranked.where(Book.book_id.not_in(picked)).limit(limit - len(books))
+            )
+        return books
+
+    @staticmethod
+    async def recommend(db: AsyncSession, user_id: str, limit: int = 20) -> List[Book]:
+        """
+        The user's precomputed recommendations, best first; users the last
+        build had no history for (or whose recommendations have all been
+        deleted since) get the category-popularity fallback.
+        """
+        book_ids: Optional[list] = (await db.execute(
+            select(UserRecommendation.book_ids[1:limit]).where(UserRecommendation.user_id == user_id)
+        )).scalar_one_or_none()
+        if not book_ids:
+            return await RecommendationCRUD._cold_start(db, user_id, limit)
+
+        books = await RecommendationCRUD._books(
+            db, RecommendationCRUD._book_query().where(Book.book_id.in_(book_ids))
+        )
+        if not books:
+            # Every recommended book was deleted since the build
+            return await RecommendationCRUD._cold_start(db, user_id, limit)
+        # Books deleted since the build simply drop out
+        rank = {book_id: position for position, book_id in enumerate(book_ids)}
+        return sorted(books, key=lambda book: rank[book.book_id])
@@ -1,8 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.settings import Settings
+from app.crud.cache_version import CacheVersionCRUD
+from app.models.cache_version import SETTINGS_SCOPE
 from app.schemas.settings import SettingsUpdate
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, func
+
+# Postgres NOTIFY channel announcing settings changes to every worker
+SETTINGS_CHANNEL = "library_settings"
 
 
 class SettingsCRUD:
@@ -16,22 +21,22 @@ class SettingsCRUD:
 
     @staticmethod
     async def get_settings(db: AsyncSession):
-        result = await db.execute("SELECT * FROM settings LIMIT 1")
-        return result.fetchone()
+        result = await db.execute(select(Settings).limit(1))
+        return result.scalars().first()
 
     @staticmethod
     async def update_settings(db: AsyncSession, settings_update: SettingsUpdate):
-        result = await db.execute("SELECT * FROM settings LIMIT 1")
-        settings = result.fetchone()
+        settings = await SettingsCRUD.get_settings(db)
         if not settings:
             raise HTTPException(status_code=404, detail="Settings not found")
 
         update_data = settings_update.dict(exclude_unset=True)
-        await db.execute(
-            "UPDATE settings SET "
-            + ", ".join([f"{key} = :{key}" for key in update_data.keys()])
-            + " WHERE setting_id = :setting_id",
-            {**update_data, "setting_id": settings.setting_id},
-        )
+        for key, value in update_data.items():
+            setattr(settings, key, value)
+
+        # Delivered on commit; workers drop their cached copy when they hear it
+        await db.execute(select(func.pg_notify(SETTINGS_CHANNEL, "")))
         await db.commit()
-        return await SettingsCRUD.get_settings(db)
+        await CacheVersionCRUD.bump(db, SETTINGS_SCOPE)
+        await db.refresh(settings)
+        return settings
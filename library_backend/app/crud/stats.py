@@ -0,0 +1,58 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import Optional
+from app.models.borrow import BorrowRecord
+from app.models.book import Book
+from app.models.user import User
+from app.schemas.stats import DashboardStats, MyDashboardStats
+from app.utils.cache import TTLCache
+from app.config import settings
+
+# Statuses reported by the dashboards (borrow_records stores them as free text)
+BORROW_STATUSES = ("borrowed", "returned", "overdue", "pdf-borrow")
+REQUEST_STATUSES = ("pending", "accepted", "rejected")
+
+_cache = TTLCache(ttl=settings.STATS_CACHE_TTL_SECONDS, maxsize=4096)
+
+
+class StatsCRUD:
+
+    @staticmethod
+    async def dashboard(db: AsyncSession, user_id: Optional[str] = None):
+        """
+        All dashboard counts in a single statement: one COUNT(*) FILTER per
+        status over borrow_records, plus catalog/member totals for the admin view.
+        Scoped to `user_id` when given. Cached for STATS_CACHE_TTL_SECONDS.
+        """
+        cached = _cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        columns = [
+            func.count().filter(BorrowRecord.borrow_status == status) for status in BORROW_STATUSES
+        ] + [
+            func.count().filter(BorrowRecord.request_status == status) for status in REQUEST_STATUSES
+        ]
+        if user_id is None:
+            columns += [
+                select(func.count()).select_from(Book).scalar_subquery(),
+                select(func.count()).select_from(User).scalar_subquery(),
+            ]
+
+        stmt = select(*columns).select_from(BorrowRecord)
+        if user_id is not None:
+            stmt = stmt.where(BorrowRecord.user_id == user_id)
+
+        row = (await db.execute(stmt)).one()
+        counts = {
+            "borrow_status": dict(zip(BORROW_STATUSES, row[:len(BORROW_STATUSES)])),
+            "request_status": dict(zip(REQUEST_STATUSES, row[len(BORROW_STATUSES):len(BORROW_STATUSES) + len(REQUEST_STATUSES)])),
+        }
+
+        if user_id is None:
+            stats = DashboardStats(total_books=row[-2], total_users=row[-1], **counts)
+        else:
+            stats = MyDashboardStats(**counts)
+
+        _cache.set(user_id, stats)
+        return stats
@@ -4,10 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.principal import principal_cache
+from app.core.passwords import password_hasher
 
 class UserCRUD:
 
@@ -48,7 +47,7 @@ class UserCRUD:
 
     @staticmethod
     async def create_user(db: AsyncSession, user: UserCreate):
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = await password_hasher.hash(user.password)
         db_user = User(
             user_name=user.user_name,
             user_email=user.user_email,
@@ -65,16 +64,27 @@ class UserCRUD:
     async def update_user(db: AsyncSession, db_user: User, user_update: UserUpdate):
         update_data = user_update.dict(exclude_unset=True)
         if "password" in update_data:
-            update_data["password"] = pwd_context.hash(update_data["password"])
+            update_data["password"] = await password_hasher.hash(update_data["password"])
         for key, value in update_data.items():
             setattr(db_user, key, value)
         db.add(db_user)
+        await principal_cache.notify_invalidation(db, db_user.user_id)
         await db.commit()
+        await principal_cache.invalidate(db_user.user_id)
         await db.refresh(db_user)
         return db_user
 
+    @staticmethod
+    async def set_password_hash(db: AsyncSession, db_user: User, hashed_password: str):
+        """Replace the stored hash (e.g. rehash on login after a cost change)."""
+        db_user.password = hashed_password
+        await db.commit()
+
     @staticmethod
     async def delete_user(db: AsyncSession, db_user: User):
+        user_id = db_user.user_id
         await db.delete(db_user)
+        await principal_cache.notify_invalidation(db, user_id)
         await db.commit()
+        await principal_cache.invalidate(user_id)
         return True
@@ -1,35 +1,75 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db  
+from app.config import settings
+from app.database import get_db, async_session, read_session
 from app.core.security import decode_access_token
+from app.core.principal import Principal, principal_cache
+from app.core.replica import replica_monitor, recent_writers, token_subject
 from app.crud.user import UserCRUD
 
 security = HTTPBearer()
 
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only routes. Uses the replica when one is configured,
+    its lag is acceptable and the caller has not just written; otherwise
+    the primary.
+    """
+    factory = async_session
+    if replica_monitor is not None:
+        user_id = token_subject(request.headers.get("Authorization"))
+        if not (user_id and await recent_writers.contains(user_id)) and await replica_monitor.healthy():
+            factory = read_session
+    async with factory() as session:
+        yield session
+
+
+def _token_claims(credentials: HTTPAuthorizationCredentials) -> dict:
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or not payload.get("sub"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="INVALID_TOKEN")
+    return payload
+
+
+async def get_principal(db: AsyncSession, user_id: str) -> Principal:
+    """Cached principal for user_id; only touches the DB on a cache miss."""
+    principal = await principal_cache.get(user_id)
+    if principal is None:
+        user = await UserCRUD.get(db, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_FOUND")
+        principal = Principal.from_user(user)
+        await principal_cache.set(principal)
+    return principal
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-):
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    if payload is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="INVALID_TOKEN")
+) -> Principal:
+    claims = _token_claims(credentials)
+    return await get_principal(db, claims["sub"])
 
-    user_id = payload.get("sub")
-    role = payload.get("role")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="INVALID_TOKEN")
 
-    user = await UserCRUD.get(db, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="USER_NOT_FOUND")
+async def get_current_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    claims = _token_claims(credentials)
 
-    return user
+    if settings.AUTH_ROLE_FROM_TOKEN:
+        # Fast path: the signed role claim decides, so a demotion or deletion
+        # only takes effect when the token expires. A principal cached in this
+        # worker is preferred when present, but invalidation removes it.
+        cached = principal_cache.peek(claims["sub"])
+        role = cached.role if cached else claims.get("role")
+        if role != "admin":
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="FORBIDDEN")
+        return cached or Principal.from_claims(claims)
 
-async def get_current_admin(current_user=Depends(get_current_user)):
+    current_user = await get_principal(db, claims["sub"])
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="FORBIDDEN")
     return current_user
-
-
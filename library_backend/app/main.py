@@ -1,10 +1,27 @@
 import asyncio
-from fastapi import FastAPI
-from app.api import auth, users, books, categories, borrow, admin,  uploads, settings, donation_book
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from app.api import auth, users, books, categories, borrow, admin,  uploads, settings, donation_book, stats, metrics, exports
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.api.exports import EXPORT_STARTED_HEADER
+from app.core.replica import recent_writers, token_subject
+from app.core.pg_listener import pg_listener
+from app.core.jobs import jobs
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pg_listener.start()
+    for job in jobs:
+        job.start()
+    yield
+    for job in jobs:
+        await job.stop()
+    await pg_listener.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -13,9 +30,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified", EXPORT_STARTED_HEADER],
 )
 
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@app.middleware("http")
+async def mark_recent_writers(request: Request, call_next):
+    """After a successful write, keep that user's reads on the primary for a while."""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        user_id = token_subject(request.headers.get("Authorization"))
+        if user_id:
+            await recent_writers.mark(user_id)
+    return response
+
+
 
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -28,6 +60,9 @@ app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(settings.router, prefix="/settings", tags=["Settings"])
 app.include_router(settings.router) 
 app.include_router(donation_book.router, prefix="/donation", tags="Donation Book")
+app.include_router(stats.router, prefix="/stats", tags=["Stats"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
+app.include_router(exports.router, prefix="/exports", tags=["Exports"])
 
 
 @app.get("/")
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Boolean, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, DECIMAL, Boolean, ForeignKey, TIMESTAMP, Computed, Index, JSON
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Text search configuration used by the generated search_vector column.
+# Must match the one used when querying so the GIN index is picked up.
+SEARCH_CONFIG = "english"
+
 class Book(Base):
     __tablename__ = "books"
 
@@ -10,7 +16,12 @@ class Book(Base):
     book_author = Column(String(150), nullable=False)
     book_category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="CASCADE"))
     book_rating = Column(DECIMAL(2,1), default=0)
+    # Running aggregates of user_rating, so a vote is O(1) instead of re-averaging
+    rating_sum = Column(DECIMAL(12,1), nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     book_photo = Column(String, nullable=True)
+    # {"webp": "<url> 160w, <url> 320w, ...", "avif": ...} derived from book_photo
+    book_photo_srcset = Column(JSON, nullable=True)
     book_pdf = Column(String, nullable=True)
     book_audio = Column(String, nullable=True)
     book_details = Column(String, nullable=True)
@@ -19,3 +30,36 @@ class Book(Base):
     book_review_count = Column(Integer, default=0)
     featured = Column(Boolean, default=False, nullable=True)  
     created_at = Column(TIMESTAMP, server_default=func.now())
+    # Maintained by the set_updated_at trigger; drives incremental exports
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), index=True)
+
+    # Weighted full-text document: title (A) > author (B) > details (C).
+    # Generated by Postgres, so it never drifts from the source columns.
+    # Deferred so regular book selects don't ship the vector over the wire.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(book_title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(book_author, '')), 'B') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(book_details, '')), 'C')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+
+    __table_args__ = (
+        # Keyset pagination sort keys
+        Index("ix_books_book_rating_book_id", "book_rating", "book_id"),
+        Index("ix_books_book_category_id_book_id", "book_category_id", "book_id"),
+        # New arrivals: created_at range, newest first
+        Index("ix_books_created_at_book_id", created_at.desc(), book_id.desc()),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_books_book_title_trgm", "book_title",
+            postgresql_using="gin", postgresql_ops={"book_title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_books_book_author_trgm", "book_author",
+            postgresql_using="gin", postgresql_ops={"book_author": "gin_trgm_ops"},
+        ),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class BookImportJob(Base):
+    """
+    Progress of a bulk book import (see app.core.book_import). Written by
+    the worker running the import after every batch, so any worker can
+    report on it.
+    """
+    __tablename__ = "book_import_jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    source = Column(String(255), nullable=False)
+    format = Column(String(10), nullable=False)
+    status = Column(String(10), nullable=False)    # running | done | failed
+    rows_read = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list, server_default="[]")   # [{line, detail}]
+    detail = Column(Text, nullable=True)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, String
+from sqlalchemy import Column, Integer, ForeignKey, Date, String, Index, TIMESTAMP, text
+from sqlalchemy.sql import func
 from app.database import Base
 
 class BorrowRecord(Base):
@@ -11,8 +12,21 @@ class BorrowRecord(Base):
     return_date = Column(Date)
     borrow_status = Column(String(50), default="borrowed")    # borrowed / returned / overdue
     request_status = Column(String(50), default="pending")    # pending / accepted / rejected
+    # Maintained by the set_updated_at trigger; drives incremental exports
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), index=True)
 
-
-
-
-
+    __table_args__ = (
+        # Per-user dashboard counts and lists
+        Index("ix_borrow_records_user_id_borrow_status", "user_id", "borrow_status"),
+        Index("ix_borrow_records_user_id_request_status", "user_id", "request_status"),
+        # Admin counts and lists by status
+        Index("ix_borrow_records_borrow_status", "borrow_status"),
+        Index("ix_borrow_records_request_status", "request_status"),
+        # Joins to books and ON DELETE CASCADE from books
+        Index("ix_borrow_records_book_id", "book_id"),
+        # Active loans only, ordered by due date (overdue sweeps)
+        Index(
+            "ix_borrow_records_active_return_date", "return_date",
+            postgresql_where=text("borrow_status = 'borrowed'"),
+        ),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, TIMESTAMP
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Scopes with a version row (seeded by the migration)
+CATALOG_SCOPE = "catalog"     # books, categories, ratings, availability (not loan counts)
+SETTINGS_SCOPE = "settings"
+
+
+class CacheVersion(Base):
+    """
+    Monotonic counter per cache scope. Bumped right after any change to the
+    scope's data commits (see CacheVersionCRUD.bump); HTTP ETags are
+    derived from it.
+    """
+    __tablename__ = "cache_versions"
+
+    scope = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
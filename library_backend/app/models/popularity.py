@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, ForeignKey, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Watermark row for the popularity refresh (seeded by the migration)
+POPULARITY_WATERMARK = "book_popularity"
+
+
+class BookPopularity(Base):
+    """
+    Precomputed ranking per book, maintained by PopularityCRUD.refresh.
+
+    `heat` is the time-decayed borrow count kept in the log domain against a
+    fixed epoch: ln(sum(exp(rate * days_since_epoch))) over the book's
+    borrows. Decay is the same factor for every book, so ordering by heat
+    is ordering by "borrows right now, decayed", and new borrows fold in
+    with a logaddexp instead of rescanning history. `score` adds the rating
+    and review signals on the same log scale.
+    """
+    __tablename__ = "book_popularity"
+
+    book_id = Column(Integer, ForeignKey("books.book_id", ondelete="CASCADE"), primary_key=True)
+    heat = Column(Float, nullable=False)
+    score = Column(Float, nullable=False)
+    borrow_count = Column(Integer, nullable=False, default=0, server_default="0")
+    refreshed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Keyset pagination sort keys for /books/popular and /books/recommended
+        Index("ix_book_popularity_score_book_id", "score", "book_id"),
+        Index("ix_book_popularity_heat_book_id", "heat", "book_id"),
+    )
+
+
+class RankingWatermark(Base):
+    """How far an incremental ranking job has consumed its source table."""
+    __tablename__ = "ranking_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0, server_default="0")
+    refreshed_at = Column(TIMESTAMP, nullable=True)
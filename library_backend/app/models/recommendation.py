@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, TIMESTAMP
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UserRecommendation(Base):
+    """
+    Precomputed top-k books per user (see app.core.recommendations), one
+    row per user: parallel arrays, best first. Rebuilt offline.
+    """
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(String(50), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    book_ids = Column(ARRAY(Integer), nullable=False)
+    scores = Column(ARRAY(Float(precision=24)), nullable=False)   # real[]
+    built_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -15,6 +15,8 @@ class User(Base):
     user_photo = Column(String, nullable=True)
     password = Column(String(255), nullable=False)
     role = Column(String(50), default="user")
+    # Borrow records currently holding a copy; maintained by BorrowCRUD
+    active_loan_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.now())
 
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 
@@ -9,6 +9,7 @@ class BookPublic(BaseModel):
     book_title: str
     book_category_id: int
     book_photo: Optional[HttpUrl]
+    book_photo_srcset: Optional[Dict[str, str]] = None
     book_availability: bool = Field(..., alias="book_availability")
 
     class Config:
@@ -24,6 +25,7 @@ class BookDetail(BaseModel):
     ##category_title: Optional[str]
     book_rating: float
     book_photo: Optional[HttpUrl]
+    book_photo_srcset: Optional[Dict[str, str]] = None
     book_pdf: Optional[HttpUrl]
     book_audio: Optional[HttpUrl]
     book_details: Optional[str]
@@ -44,6 +46,7 @@ class BookDetail2(BaseModel):
     category_title: str
     book_rating: float
     book_photo: Optional[HttpUrl]
+    book_photo_srcset: Optional[Dict[str, str]] = None
     book_pdf: Optional[HttpUrl]
     book_audio: Optional[HttpUrl]
     book_details: Optional[str]
@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field, root_validator
+from typing import List, Literal, Optional
+from datetime import datetime
+
+ImportFormat = Literal["csv", "jsonl"]
+
+
+class BookImportRow(BaseModel):
+    """
+    One line of an import file. The category is given either by title
+    (`category`) or by id (`book_category_id`); media fields are object
+    names (or stored URLs) of files already in the bucket.
+    """
+    book_title: str = Field(..., min_length=1, max_length=200)
+    book_author: str = Field(..., min_length=1, max_length=150)
+    category: Optional[str] = None
+    book_category_id: Optional[int] = None
+    book_count: int = Field(1, ge=0)
+    book_details: Optional[str] = None
+    book_photo: Optional[str] = None
+    book_pdf: Optional[str] = None
+    book_audio: Optional[str] = None
+    featured: bool = False
+
+    class Config:
+        anystr_strip_whitespace = True
+
+    @root_validator(pre=True)
+    def blank_is_missing(cls, values):
+        # CSV has no null: an empty cell means "not given"
+        return {key: value for key, value in values.items() if value not in ("", None)}
+
+    @root_validator(skip_on_failure=True)
+    def category_given(cls, values):
+        if values.get("category") is None and values.get("book_category_id") is None:
+            raise ValueError("category or book_category_id is required")
+        return values
+
+
+class BookImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class BookImportJobOut(BaseModel):
+    job_id: str
+    source: str
+    format: ImportFormat
+    status: Literal["running", "done", "failed"]
+    rows_read: int
+    inserted: int
+    failed: int
+    errors: List[BookImportRowError]
+    detail: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
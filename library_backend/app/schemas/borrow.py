@@ -6,6 +6,9 @@ from typing import Optional, List
 BORROW_STATUS = {"borrowed", "returned", "overdue"}
 REQUEST_STATUS = {"accept", "pending", "reject"}
 
+# Sortable listing columns; prefix with "-" for descending
+BORROW_SORT_FIELDS = {"borrow_id", "borrow_date", "return_date"}
+
 
 
 
@@ -41,6 +44,10 @@ class BorrowRecord(BaseModel):
         orm_mode = True
 
 
+class PdfBorrowRecord(BorrowRecord):
+    pdf_url: Optional[str] = None    # presigned, expiring download link
+
+
 class BorrowCreate(BaseModel):
     # user_name: str
     # borrow_date: date
@@ -96,4 +103,44 @@ class BorrowDetailResponse(BaseModel):
     request_status: str
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+
+class BorrowFilter(BaseModel):
+    user_id: Optional[str] = None
+    book_id: Optional[int] = None
+    borrow_status: Optional[str] = None
+    request_status: Optional[str] = None
+    date_from: Optional[date] = None    # borrow_date on or after
+    date_to: Optional[date] = None      # borrow_date on or before
+    sort: str = "borrow_id"
+
+    @validator("sort")
+    def validate_sort(cls, v):
+        if v.lstrip("-") not in BORROW_SORT_FIELDS:
+            raise ValueError(f"Invalid sort, must be one of {BORROW_SORT_FIELDS} optionally prefixed with '-'")
+        return v
+
+
+
+# Most borrow_ids accepted by one batch call
+BORROW_BATCH_MAX = 1000
+
+
+class BorrowBatchRequest(BaseModel):
+    borrow_ids: List[int] = Field(..., min_items=1, max_items=BORROW_BATCH_MAX)
+
+
+class BorrowBatchItemResult(BaseModel):
+    borrow_id: int
+    ok: bool
+    detail: Optional[str] = None            # why the item was skipped
+    borrow_status: Optional[str] = None     # state after the batch
+    request_status: Optional[str] = None
+
+
+class BorrowBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BorrowBatchItemResult]
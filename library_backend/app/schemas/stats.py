@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class MyDashboardStats(BaseModel):
+    borrow_status: Dict[str, int] = Field(..., example={"borrowed": 2, "returned": 5, "overdue": 0})
+    request_status: Dict[str, int] = Field(..., example={"pending": 1, "accepted": 6, "rejected": 0})
+
+
+class DashboardStats(MyDashboardStats):
+    total_books: int
+    total_users: int
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Dict, Literal, Optional
+
+MediaField = Literal["book_photo", "book_pdf", "book_audio"]
+UploadTarget = Literal["book", "donation"]
+
+
+class PresignUploadRequest(BaseModel):
+    field: MediaField
+    filename: str
+    content_type: Optional[str] = None
+    # The record the file is for; checked the same way as on completion
+    target: UploadTarget
+    target_id: int
+
+
+class PresignUploadResponse(BaseModel):
+    object_name: str
+    upload_url: str
+    # Form fields to POST (multipart) to upload_url, before the file itself
+    fields: Dict[str, str]
+    expires_in: int
+
+
+class UploadComplete(BaseModel):
+    object_name: str
+    field: MediaField
+    target: UploadTarget
+    target_id: int
+
+
+class UploadCompleteResponse(BaseModel):
+    url: str
@@ -0,0 +1,70 @@
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # shared cache is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small in-process cache with per-entry expiry and LRU eviction.
+    Not shared between workers; keep TTLs short for data other workers can change.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def get_redis(url: Optional[str]):
+    """
+    Shared async Redis client for `url`, or None when no URL is configured
+    or the redis package is not installed (callers then stay in-process).
+    """
+    if not url:
+        return None
+    if aioredis is None:
+        logger.warning("REDIS_URL is set but the redis package is not installed; using in-process caches only")
+        return None
+    return aioredis.from_url(url)
@@ -0,0 +1,82 @@
+"""
+Conditional GET for cacheable public endpoints.
+
+    @router.get("/", dependencies=[Depends(cached_by(CATALOG_SCOPE))])
+
+The ETag and Last-Modified validators come from the scope's row in
+cache_versions. The row is bumped after every write that can change the
+responses, so a version match means the client's copy is still current.
+The exception is book_count: borrows and returns only bump the catalog
+when they flip book_availability, so a cached count can lag until the
+next catalog change (availability itself is always current).
+If-None-Match (or If-Modified-Since) matching answers 304 before the
+endpoint runs its queries.
+
+Responses that also depend on today's date (e.g. "added in the last 30
+days") use cached_by(scope, daily=True): their validators also change at
+UTC midnight.
+"""
+from datetime import datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud.cache_version import CacheVersionCRUD
+from app.dependencies import get_read_db
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: intermediaries may add or strip the W/ prefix
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, updated_at) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return updated_at.replace(microsecond=0) <= since
+
+
+def cached_by(scope: str, daily: bool = False):
+    """Dependency adding validators/Cache-Control for `scope` and answering 304."""
+
+    async def conditional_get(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+        row = await CacheVersionCRUD.get(db, scope)
+        if row is None:
+            return
+
+        etag, updated_at = f"{scope}-{row.version}", row.updated_at
+        if daily:
+            today = datetime.now(timezone.utc).date()
+            etag = f"{etag}-{today.isoformat()}"
+            updated_at = max(updated_at, datetime.combine(today, time.min, tzinfo=timezone.utc))
+
+        headers = {
+            "ETag": f'W/"{etag}"',
+            "Last-Modified": format_datetime(updated_at.astimezone(timezone.utc), usegmt=True),
+            "Cache-Control": (
+                f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, "
+                f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS}"
+            ),
+        }
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, headers["ETag"])
+        else:
+            if_modified_since = request.headers.get("If-Modified-Since")
+            not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, updated_at)
+
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return conditional_get
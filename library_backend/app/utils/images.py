@@ -0,0 +1,123 @@
+"""
+Responsive derivatives for book cover photos.
+
+Each cover gets downscaled WebP (and AVIF, when the installed Pillow can
+encode it) copies at THUMBNAIL_WIDTHS, stored next to the original under
+thumbs/<original name>/<width>w.<format>. The result is a srcset map,
+e.g. {"webp": "http://.../160w.webp 160w, http://.../320w.webp 320w"},
+saved on Book.book_photo_srcset.
+
+Everything here is blocking (call it through run_in_upload_pool) except
+build_srcset_async, which the upload endpoints use.
+"""
+import io
+import logging
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.minio_utils import minio_client, object_name_from_url, object_url, run_in_upload_pool
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; without it books simply get no srcset
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_FOLDER = "thumbs"
+
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def thumbnail_formats() -> List[str]:
+    """Formats the installed Pillow can encode, smallest output first."""
+    if Image is None:
+        return []
+    formats = ["webp"] if features.check("webp") else []
+    if features.check("avif"):
+        formats.insert(0, "avif")
+    return formats
+
+
+def derivative_name(object_name: str, width: int, fmt: str) -> str:
+    stem = object_name.rsplit(".", 1)[0]
+    return f"{THUMBNAIL_FOLDER}/{stem}/{width}w.{fmt}"
+
+
+def render_thumbnails(source: BinaryIO, formats: List[str]) -> Iterator[Tuple[int, str, bytes]]:
+    """
+    Yield (width, format, encoded bytes) for every configured width that does
+    not upscale the original. Images narrower than the smallest width still
+    get one derivative at their own size.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        widths = sorted(w for w in settings.THUMBNAIL_WIDTHS if w <= image.width) or [image.width]
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=settings.THUMBNAIL_QUALITY)
+                yield width, fmt, buffer.getvalue()
+
+
+def build_srcset(object_name: str, source: Optional[BinaryIO] = None) -> Optional[Dict[str, str]]:
+    """
+    Generate and upload derivatives for a cover already stored as
+    `object_name`. `source` is the original file when the caller still has
+    it; otherwise it is downloaded. Returns None if Pillow is missing or the
+    image can't be processed, so callers can treat thumbnails as best effort.
+    """
+    formats = thumbnail_formats()
+    if not formats or not object_name:
+        return None
+
+    try:
+        if source is None:
+            response = minio_client.get_object(settings.MINIO_BUCKET, object_name)
+            try:
+                source = io.BytesIO(response.read())
+            finally:
+                response.close()
+                response.release_conn()
+        else:
+            source.seek(0)
+
+        srcset: Dict[str, List[str]] = {fmt: [] for fmt in formats}
+        for width, fmt, data in render_thumbnails(source, formats):
+            name = derivative_name(object_name, width, fmt)
+            minio_client.put_object(
+                bucket_name=settings.MINIO_BUCKET,
+                object_name=name,
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type=CONTENT_TYPES[fmt],
+            )
+            srcset[fmt].append(f"{object_url(name)} {width}w")
+    except Exception:
+        logger.warning("Could not build thumbnails for %s", object_name, exc_info=True)
+        return None
+
+    return {fmt: ", ".join(entries) for fmt, entries in srcset.items()}
+
+
+async def build_srcset_async(object_name: Optional[str], source: Optional[BinaryIO] = None) -> Optional[Dict[str, str]]:
+    """
+    Non-blocking build_srcset that never fails the caller. Runs after the
+    originals are stored, so a full upload queue (or any other error) must
+    not turn into an error response that orphans them: the book is saved
+    without a srcset and backfill-thumbnails picks it up later.
+    """
+    try:
+        return await run_in_upload_pool(build_srcset, object_name, source)
+    except Exception:
+        logger.warning("Skipped thumbnails for %s, leaving them to the backfill", object_name, exc_info=True)
+        return None
+
+
+def build_srcset_for_url(url: Optional[str]) -> Optional[Dict[str, str]]:
+    """build_srcset for a stored book_photo URL (used by the backfill)."""
+    return build_srcset(object_name_from_url(url))
@@ -1,6 +1,13 @@
 
+import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import PostPolicy
+from minio.error import S3Error
 from fastapi import UploadFile, HTTPException
 from app.config import settings
 
@@ -8,14 +15,38 @@ minio_client = Minio(
     settings.MINIO_ENDPOINT,
     access_key=settings.MINIO_ACCESS_KEY,
     secret_key=settings.MINIO_SECRET_KEY,
-    secure=False
+    secure=False,
+    region=settings.MINIO_REGION,
+)
+
+# Signs URLs for the host clients actually reach. Signing is local (the region
+# is fixed), so it is safe to call from async code.
+presign_client = Minio(
+    settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT,
+    access_key=settings.MINIO_ACCESS_KEY,
+    secret_key=settings.MINIO_SECRET_KEY,
+    secure=settings.MINIO_PUBLIC_SECURE,
+    region=settings.MINIO_REGION,
 )
 
 ALLOWED_EXTENSIONS = {
     "png", "jpg", "jpeg", "pdf", "mp3", "wav"
 }
 
-MAX_FILE_SIZE = 100 * 1024 * 1024  # 10 MB
+MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
+FILE_SIZE_LIMIT_MESSAGE = f"File size exceeds {MAX_FILE_SIZE // (1024 * 1024)} MB"
+
+# Presigned uploads land here and only move to their media folder once
+# confirmed, so anything left under it was never attached to a record
+# (see sweep_pending_uploads)
+PENDING_UPLOAD_PREFIX = "pending/"
+
+# Media columns (same on Book and DonationBook) -> (folder, allowed extensions)
+MEDIA_FIELDS = {
+    "book_photo": ("books", {"png", "jpg", "jpeg"}),
+    "book_pdf": ("book_pdfs", {"pdf"}),
+    "book_audio": ("book_audios", {"mp3", "wav"}),
+}
 
 
 def validate_file(file: UploadFile):
@@ -31,7 +62,7 @@ def validate_file(file: UploadFile):
     file_size = file.file.tell()
     file.file.seek(0)
     if file_size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File size exceeds 10 MB")
+        raise HTTPException(status_code=400, detail=FILE_SIZE_LIMIT_MESSAGE)
 
     return extension
 
@@ -57,6 +88,11 @@ def upload_file(file: UploadFile, folder: str = "uploads"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MinIO upload failed: {str(e)}")
 
+    return object_url(object_name)
+
+
+def object_url(object_name: str) -> str:
+    """URL stored on records for an object in the media bucket."""
     return f"http://{settings.MINIO_ENDPOINT}/{settings.MINIO_BUCKET}/{object_name}"
 
 
@@ -68,6 +104,182 @@ def delete_file(object_name: str):
         raise HTTPException(status_code=500, detail=f"MinIO delete failed: {str(e)}")
 
 
+def object_name_from_url(url: str) -> Optional[str]:
+    """Recover the object name from a URL returned by upload_file."""
+    prefix = f"http://{settings.MINIO_ENDPOINT}/{settings.MINIO_BUCKET}/"
+    if not url or not url.startswith(prefix):
+        return None
+    return url[len(prefix):]
+
+
+def _presign_expiry() -> timedelta:
+    return timedelta(seconds=settings.MINIO_PRESIGN_EXPIRY_SECONDS)
+
+
+def presigned_upload(field: str, filename: str) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Reserve a pending object name for a media field and return
+    (object_name, url, fields): a multipart POST of `fields` plus the file
+    to url stores it until the policy expires. The policy pins the object
+    name and caps the size at MAX_FILE_SIZE, so storage rejects anything
+    bigger before it is written.
+    """
+    if field not in MEDIA_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid field, must be one of {set(MEDIA_FIELDS)}")
+    folder, allowed = MEDIA_FIELDS[field]
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid file type for {field}. Allowed: {', '.join(sorted(allowed))}")
+
+    object_name = f"{PENDING_UPLOAD_PREFIX}{folder}/{uuid.uuid4()}.{extension}"
+    policy = PostPolicy(settings.MINIO_BUCKET, datetime.now(timezone.utc) + _presign_expiry())
+    policy.add_equals_condition("key", object_name)
+    policy.add_content_length_range_condition(1, MAX_FILE_SIZE)
+    fields = {"key": object_name, **presign_client.presigned_post_policy(policy)}
+
+    scheme = "https" if settings.MINIO_PUBLIC_SECURE else "http"
+    url = f"{scheme}://{settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT}/{settings.MINIO_BUCKET}"
+    return object_name, url, fields
+
+
+def confirm_upload(field: str, object_name: str) -> str:
+    """
+    Check that a presigned upload for `field` really landed and is within the
+    size limit, then move it out of the pending area. Returns the URL to
+    store on the record. Blocking.
+    """
+    folder, _ = MEDIA_FIELDS[field]
+    if not object_name.startswith(f"{PENDING_UPLOAD_PREFIX}{folder}/") or ".." in object_name:
+        raise HTTPException(status_code=400, detail="Object does not belong to this field")
+
+    try:
+        stat = minio_client.stat_object(settings.MINIO_BUCKET, object_name)
+    except S3Error:
+        raise HTTPException(status_code=404, detail="Uploaded object not found")
+
+    if stat.size > MAX_FILE_SIZE:
+        delete_file(object_name)
+        raise HTTPException(status_code=400, detail=FILE_SIZE_LIMIT_MESSAGE)
+
+    final_name = object_name[len(PENDING_UPLOAD_PREFIX):]
+    try:
+        minio_client.copy_object(settings.MINIO_BUCKET, final_name, CopySource(settings.MINIO_BUCKET, object_name))
+    except S3Error as e:
+        raise HTTPException(status_code=500, detail=f"MinIO copy failed: {str(e)}")
+    try:
+        delete_file(object_name)
+    except HTTPException:
+        pass   # left for sweep_pending_uploads
+    return object_url(final_name)
+
+
+def sweep_pending_uploads(older_than: timedelta) -> int:
+    """
+    Delete presigned uploads that were never confirmed and are older than
+    `older_than`. Returns how many were removed. Blocking. (A bucket
+    lifecycle rule expiring PENDING_UPLOAD_PREFIX does the same job.)
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    removed = 0
+    for obj in minio_client.list_objects(settings.MINIO_BUCKET, prefix=PENDING_UPLOAD_PREFIX, recursive=True):
+        if obj.last_modified and obj.last_modified < cutoff:
+            minio_client.remove_object(settings.MINIO_BUCKET, obj.object_name)
+            removed += 1
+    return removed
+
+
+def stat_media(field: str, object_name: str) -> str:
+    """
+    Like confirm_upload, but for objects referenced rather than uploaded by
+    the caller (bulk imports): accepts a stored URL too, and never deletes.
+    Returns the URL to store. Blocking.
+    """
+    object_name = object_name_from_url(object_name) or object_name
+    folder, allowed = MEDIA_FIELDS[field]
+    if not object_name.startswith(f"{folder}/") or ".." in object_name:
+        raise HTTPException(status_code=400, detail=f"{field} must be an object under {folder}/")
+    if object_name.rsplit(".", 1)[-1].lower() not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid file type for {field}. Allowed: {', '.join(sorted(allowed))}")
+
+    try:
+        stat = minio_client.stat_object(settings.MINIO_BUCKET, object_name)
+    except S3Error:
+        raise HTTPException(status_code=404, detail=f"{field} object not found: {object_name}")
+    if stat.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=f"{field} exceeds the size limit")
+
+    return object_url(object_name)
+
+
+def presigned_download_url(url: Optional[str]) -> Optional[str]:
+    """
+    Expiring GET URL for a stored media URL. URLs that don't point into our
+    bucket are returned unchanged.
+    """
+    object_name = object_name_from_url(url)
+    if not object_name:
+        return url
+    return presign_client.presigned_get_object(settings.MINIO_BUCKET, object_name, expires=_presign_expiry())
+
+
+# The MinIO client is blocking, so uploads run on a dedicated, bounded pool
+# instead of the event loop. One semaphore slot per pool thread: requests
+# beyond that wait (up to MINIO_UPLOAD_MAX_QUEUE of them), the rest get 503.
+_upload_executor = ThreadPoolExecutor(
+    max_workers=settings.MINIO_UPLOAD_CONCURRENCY, thread_name_prefix="minio-upload"
+)
+_upload_slots = asyncio.Semaphore(settings.MINIO_UPLOAD_CONCURRENCY)
+_upload_waiting = 0
+
+
+async def run_in_upload_pool(func, *args):
+    """Run a blocking storage call on the upload pool, applying backpressure."""
+    global _upload_waiting
+    if _upload_slots.locked() and _upload_waiting >= settings.MINIO_UPLOAD_MAX_QUEUE:
+        raise HTTPException(status_code=503, detail="UPLOAD_QUEUE_FULL: try again shortly")
+
+    _upload_waiting += 1
+    try:
+        await _upload_slots.acquire()
+    finally:
+        _upload_waiting -= 1
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_upload_executor, func, *args)
+    finally:
+        _upload_slots.release()
+
+
+async def upload_file_async(file: UploadFile, folder: str = "uploads"):
+    """Non-blocking upload_file: same validation and return value."""
+    if not file:
+        return None
+    return await run_in_upload_pool(upload_file, file, folder)
+
+
+async def upload_files_async(*uploads: Tuple[Optional[UploadFile], str]):
+    """
+    Upload several (file, folder) pairs concurrently and return their URLs in
+    order (None for missing files). If any upload fails, the ones that
+    succeeded are removed so no orphaned objects are left behind.
+    """
+    results = await asyncio.gather(
+        *(upload_file_async(file, folder) for file, folder in uploads),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for url in results:
+            object_name = object_name_from_url(url) if isinstance(url, str) else None
+            if object_name:
+                try:
+                    await run_in_upload_pool(delete_file, object_name)
+                except HTTPException:
+                    pass
+        raise errors[0]
+    return results
+
+
 
 # import uuid
 # from minio import Minio
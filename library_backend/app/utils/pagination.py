@@ -1,4 +1,17 @@
-from typing import Optional
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, tuple_
+
+from app.core.exceptions import validation_error
+
+# Response header carrying the opaque cursor for the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 def paginate(queryset: list, page: int = 1, page_size: int = 20):
     total = len(queryset)
@@ -9,3 +22,78 @@ def paginate(queryset: list, page: int = 1, page_size: int = 20):
         "data": data,
         "meta": {"total": total, "page": page, "page_size": page_size}
     }
+
+
+def _dump(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load(value: Any, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row into an opaque cursor."""
+    payload = json.dumps([_dump(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """Decode a cursor back into typed values for the given sort columns."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(columns):
+            raise ValueError("cursor shape mismatch")
+        return [_load(value, column) for value, column in zip(raw, columns)]
+    except (ValueError, TypeError, ArithmeticError, binascii.Error):
+        raise validation_error({"cursor": "Invalid cursor"})
+
+
+def keyset(stmt, columns: Sequence, cursor: Optional[str] = None):
+    """
+    Order `stmt` descending on `columns` (last one must be unique, e.g. the PK)
+    and, when a cursor is given, resume strictly after the row it points to.
+    The row-value comparison lets Postgres walk a matching btree index instead
+    of counting past OFFSET rows.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        stmt = stmt.where(
+            tuple_(*columns) < tuple_(*(
+                bindparam(None, value, type_=column.type) for value, column in zip(values, columns)
+            ))
+        )
+    return stmt.order_by(*(column.desc() for column in columns))
+
+
+def keyset_page(
+    items: list,
+    limit: int,
+    columns: Sequence,
+    key: Optional[Callable[[Any], Sequence[Any]]] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Trim the look-ahead row (queries fetch `limit + 1`) and build the cursor
+    for the next page, or None when this is the last page.
+    """
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    values = key(last) if key else [getattr(last, column.key) for column in columns]
+    return items, encode_cursor(values)
+
+
+def set_next_cursor(response, next_cursor: Optional[str]):
+    """Expose the next-page cursor to the client, if there is a next page."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
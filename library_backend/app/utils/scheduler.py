@@ -0,0 +1,78 @@
+"""
+Minimal in-process periodic jobs.
+
+    job = PeriodicJob("overdue-sweep", 300, sweep)   # sweep: async () -> Any
+    job.start() ... await job.stop()
+
+Each job runs in its own asyncio task: once right after start, then every
+`interval` seconds (measured from the end of the previous run, so runs
+never overlap). Failures are logged and counted; the loop keeps going.
+Coordination between API replicas is up to the job itself (e.g. an
+advisory lock), since every replica runs its own scheduler.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.runs = 0
+        self.failures = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Any:
+        self.last_started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            self.last_result = await self.func()
+            self.last_error = None
+            return self.last_result
+        except Exception as e:
+            self.failures += 1
+            self.last_error = repr(e)
+            logger.exception("Scheduled job %s failed", self.name)
+        finally:
+            self.runs += 1
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=f"job:{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started_at": self.last_started_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
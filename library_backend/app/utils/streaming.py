@@ -0,0 +1,145 @@
+import asyncio
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Mapping, Sequence
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; without it there is no Parquet export
+    pyarrow = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+GZIP_MEDIA_TYPE = "application/gzip"
+
+# Flush to the client roughly every 64 KB instead of once per row
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_lines(rows: AsyncIterator[Mapping[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode an async stream of row mappings as newline-delimited JSON chunks."""
+    buffer = []
+    size = 0
+    async for row in rows:
+        line = json.dumps(dict(row), default=_json_default, separators=(",", ":")) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def csv_lines(rows: AsyncIterator[Mapping[str, Any]], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """Encode an async stream of row mappings as CSV (header first) chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([row[column] for column in columns])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly, one compressed piece per input chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(sql_type, Integer):
+        return pyarrow.int64()
+    if isinstance(sql_type, Numeric):
+        return pyarrow.decimal128(sql_type.precision or 38, sql_type.scale or 0)
+    if isinstance(sql_type, DateTime):
+        return pyarrow.timestamp("us")
+    if isinstance(sql_type, Date):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+def arrow_schema(selected_columns):
+    """Parquet schema for the columns of a select() (see parquet_row_groups)."""
+    return pyarrow.schema([(column.name, _arrow_type(column.type)) for column in selected_columns])
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+async def parquet_row_groups(
+    rows: AsyncIterator[Mapping[str, Any]], schema, row_group_size: int = 50_000
+) -> AsyncIterator[bytes]:
+    """
+    Encode an async stream of row mappings as a Parquet file, yielding each
+    row group as soon as it is written, so memory stays at one row group.
+    Encoding runs in a thread to keep the event loop free.
+    """
+    sink = _Sink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+
+    def write(batch):
+        writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+
+    batch = []
+    async for row in rows:
+        batch.append(dict(row))
+        if len(batch) >= row_group_size:
+            await asyncio.to_thread(write, batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        await asyncio.to_thread(write, batch)
+    writer.close()
+    yield sink.drain()
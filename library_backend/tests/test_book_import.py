@@ -0,0 +1,82 @@
+"""
+Bulk book import: bad bytes and malformed records are row errors, and job
+progress is stored where every worker can read it.
+"""
+import io
+
+import pytest
+
+from app.core.book_import import import_jobs, iter_rows, run_import
+from app.crud.book_import_job import BookImportJobCRUD
+from app.database import async_session
+from app.models.category import Category
+
+pytestmark = pytest.mark.anyio
+
+OVERSIZED = b"y" * 200_000   # beyond csv.field_size_limit()
+
+
+def _parsed(data: bytes, fmt: str):
+    return [(line, row if isinstance(row, str) else "ok") for line, row in iter_rows(io.BytesIO(data), fmt)]
+
+
+def test_csv_bad_lines_are_row_errors():
+    data = (
+        b"\xef\xbb\xbfbook_title,book_author,category\n"
+        b"A,B,C\n"
+        b"Bad \xff byte,B,C\n"
+        b'"two\nlines",B,C\n'
+        b"X," + OVERSIZED + b",C\n"
+        b"D,E,F\n"
+    )
+    assert _parsed(data, "csv") == [
+        (2, "ok"),
+        (3, "Invalid UTF-8 on line 3: invalid start byte"),
+        (5, "ok"),
+        (6, "Invalid CSV: field larger than field limit (131072)"),
+        (7, "ok"),
+    ]
+
+
+def test_undecodable_csv_header_fails_the_file():
+    with pytest.raises(ValueError):
+        _parsed(b"book\xff_title\nA\n", "csv")
+
+
+def test_jsonl_bad_lines_are_row_errors():
+    data = b'{"book_title": "A"}\n\xfe\n\n[1]\n{bad\n'
+    parsed = _parsed(data, "jsonl")
+    assert parsed[:3] == [(1, "ok"), (2, "Invalid UTF-8 on line 2: invalid start byte"), (4, "Expected a JSON object")]
+    assert parsed[3][0] == 5 and parsed[3][1].startswith("Invalid JSON")
+
+
+async def test_job_progress_is_stored(db):
+    db.add(Category(category_title="Fiction"))
+    await db.commit()
+    data = b"book_title,book_author,category\nA,B,Fiction\nBad \xff,B,Fiction\nC,D,Unknown\nE,F,fiction\n"
+
+    job = await import_jobs.create("books.csv", "csv")
+    assert (await BookImportJobCRUD.get_job(db, job.job_id)).status == "running"
+    await run_import(job, io.BytesIO(data), batch_size=2)
+
+    # As another worker would see it
+    async with async_session() as other:
+        stored = await BookImportJobCRUD.get_job(other, job.job_id)
+    assert stored.status == "done"
+    assert (stored.rows_read, stored.inserted, stored.failed) == (4, 2, 2)
+    assert [error["line"] for error in stored.errors] == [3, 4]
+    assert stored.finished_at is not None
+
+
+async def test_old_finished_jobs_are_pruned(db, monkeypatch):
+    monkeypatch.setattr(import_jobs, "keep", 1)
+    first = await import_jobs.create("a.csv", "csv")
+    await run_import(first, io.BytesIO(b""))
+    second = await import_jobs.create("b.csv", "csv")
+    await run_import(second, io.BytesIO(b""))
+    running = await import_jobs.create("c.csv", "csv")
+
+    async with async_session() as other:
+        assert await BookImportJobCRUD.get_job(other, first.job_id) is None
+        assert (await BookImportJobCRUD.get_job(other, second.job_id)).status == "done"
+        assert (await BookImportJobCRUD.get_job(other, running.job_id)).status == "running"
@@ -0,0 +1,131 @@
+"""
+create_borrow under contention: concurrent requests must neither oversell
+a book's copies nor push a user past the loan limit.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.core.library_settings import library_settings
+from app.crud.borrow import BorrowCRUD
+from app.database import async_session
+from app.models.book import Book
+from app.models.borrow import BorrowRecord
+from app.models.category import Category
+from app.models.user import User
+from app.schemas.borrow import BorrowCreate
+
+pytestmark = pytest.mark.anyio
+
+REQUESTS = 20
+
+
+@pytest.fixture(autouse=True)
+def loan_limit(monkeypatch):
+    limit = 3
+
+    async def borrow_max_limit():
+        return limit
+
+    async def borrow_day_limit():
+        return 14
+
+    monkeypatch.setattr(library_settings, "borrow_max_limit", borrow_max_limit)
+    monkeypatch.setattr(library_settings, "borrow_day_limit", borrow_day_limit)
+    return limit
+
+
+async def _add_books(db, count: int, copies: int):
+    category = Category(category_title="Fiction")
+    db.add(category)
+    await db.flush()
+    books = [
+        Book(book_title=f"Book {n}", book_author="Author", book_category_id=category.category_id,
+             book_count=copies, book_availability=copies > 0)
+        for n in range(count)
+    ]
+    db.add_all(books)
+    await db.commit()
+    return [book.book_id for book in books]
+
+
+async def _add_users(db, count: int):
+    users = [
+        User(user_id=f"user-{n}", user_name=f"User {n}", user_email=f"user{n}@example.com", password="x")
+        for n in range(count)
+    ]
+    db.add_all(users)
+    await db.commit()
+    return users
+
+
+async def _borrow(user: User, book_id: int):
+    """One create_borrow on its own session, like one request. Returns the 409 detail or None."""
+    async with async_session() as db:
+        try:
+            await BorrowCRUD.create_borrow(db, BorrowCreate(book_id=book_id), user)
+        except HTTPException as e:
+            assert e.status_code == 409
+            return e.detail
+    return None
+
+
+async def test_concurrent_borrows_never_oversell(db):
+    copies = 3
+    [book_id] = await _add_books(db, 1, copies)
+    users = await _add_users(db, REQUESTS)
+
+    outcomes = await asyncio.gather(*(_borrow(user, book_id) for user in users))
+
+    assert outcomes.count(None) == copies
+    assert all(detail == "BOOK_UNAVAILABLE" for detail in outcomes if detail is not None)
+
+    book = (await db.execute(
+        select(Book.book_count, Book.book_availability).where(Book.book_id == book_id)
+    )).one()
+    assert book.book_count == 0
+    assert book.book_availability is False
+    records = (await db.execute(select(func.count()).select_from(BorrowRecord))).scalar_one()
+    assert records == copies
+    loans = (await db.execute(select(func.sum(User.active_loan_count)))).scalar_one()
+    assert loans == copies
+
+
+async def test_concurrent_borrows_respect_loan_limit(db, loan_limit):
+    book_ids = await _add_books(db, REQUESTS, copies=5)
+    [user] = await _add_users(db, 1)
+
+    outcomes = await asyncio.gather(*(_borrow(user, book_id) for book_id in book_ids))
+
+    assert outcomes.count(None) == loan_limit
+    assert all(detail.startswith("BORROW_LIMIT_REACHED") for detail in outcomes if detail is not None)
+
+    active_loans = (await db.execute(
+        select(User.active_loan_count).where(User.user_id == user.user_id)
+    )).scalar_one()
+    assert active_loans == loan_limit
+    records = (await db.execute(
+        select(func.count()).select_from(BorrowRecord).where(BorrowRecord.user_id == user.user_id)
+    )).scalar_one()
+    assert records == loan_limit
+    # Copies are only taken for the loans that went through
+    taken = (await db.execute(select(func.sum(5 - Book.book_count)))).scalar_one()
+    assert taken == loan_limit
+
+
+async def test_concurrent_borrows_of_one_book_by_one_user(db, loan_limit):
+    copies = REQUESTS
+    [book_id] = await _add_books(db, 1, copies)
+    [user] = await _add_users(db, 1)
+
+    outcomes = await asyncio.gather(*(_borrow(user, book_id) for _ in range(REQUESTS)))
+
+    assert outcomes.count(None) == loan_limit
+    count = (await db.execute(select(Book.book_count).where(Book.book_id == book_id))).scalar_one()
+    assert count == copies - loan_limit
+    active_loans = (await db.execute(
+        select(User.active_loan_count).where(User.user_id == user.user_id)
+    )).scalar_one()
+    assert active_loans == loan_limit
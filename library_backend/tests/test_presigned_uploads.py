@@ -0,0 +1,99 @@
+"""Presigned uploads: size-capped POST policies, confirmation and the pending sweep."""
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import minio_utils
+from app.utils.minio_utils import MAX_FILE_SIZE, PENDING_UPLOAD_PREFIX
+
+
+class FakeBucket:
+    """The subset of the MinIO client confirm_upload and the sweep use."""
+
+    def __init__(self):
+        self.objects = {}   # name -> (size, last_modified)
+
+    def add(self, name, size=10, age=timedelta(0)):
+        self.objects[name] = (size, datetime.now(timezone.utc) - age)
+
+    def stat_object(self, bucket_name, object_name):
+        if object_name not in self.objects:
+            raise minio_utils.S3Error("NoSuchKey", "missing", object_name, "", "", None)
+        return SimpleNamespace(size=self.objects[object_name][0])
+
+    def copy_object(self, bucket_name, object_name, source):
+        self.objects[object_name] = self.objects[source.object_name]
+
+    def remove_object(self, bucket_name, object_name):
+        self.objects.pop(object_name, None)
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False):
+        return [
+            SimpleNamespace(object_name=name, last_modified=modified)
+            for name, (_, modified) in self.objects.items() if name.startswith(prefix or "")
+        ]
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    fake = FakeBucket()
+    monkeypatch.setattr(minio_utils, "minio_client", fake)
+    return fake
+
+
+def test_presigned_post_pins_name_and_size():
+    object_name, url, fields = minio_utils.presigned_upload("book_pdf", "Book.PDF")
+
+    assert object_name.startswith(f"{PENDING_UPLOAD_PREFIX}book_pdfs/") and object_name.endswith(".pdf")
+    assert fields["key"] == object_name
+    conditions = json.loads(base64.b64decode(fields["policy"]))["conditions"]
+    assert ["eq", "$key", object_name] in conditions
+    assert ["content-length-range", 1, MAX_FILE_SIZE] in conditions
+    assert url.endswith(f"/{minio_utils.settings.MINIO_BUCKET}")
+
+
+def test_presign_rejects_wrong_file_type():
+    with pytest.raises(HTTPException) as excinfo:
+        minio_utils.presigned_upload("book_photo", "cover.exe")
+    assert excinfo.value.status_code == 400
+
+
+def test_confirm_moves_upload_out_of_pending(bucket):
+    bucket.add(f"{PENDING_UPLOAD_PREFIX}books/a.png")
+
+    url = minio_utils.confirm_upload("book_photo", f"{PENDING_UPLOAD_PREFIX}books/a.png")
+
+    assert minio_utils.object_name_from_url(url) == "books/a.png"
+    assert list(bucket.objects) == ["books/a.png"]
+
+
+def test_confirm_only_accepts_pending_objects_of_the_field(bucket):
+    bucket.add("books/a.png")
+    for name in ("books/a.png", f"{PENDING_UPLOAD_PREFIX}book_pdfs/a.pdf"):
+        with pytest.raises(HTTPException) as excinfo:
+            minio_utils.confirm_upload("book_photo", name)
+        assert excinfo.value.status_code == 400
+
+
+def test_confirm_deletes_oversized_upload(bucket):
+    name = f"{PENDING_UPLOAD_PREFIX}book_audios/a.mp3"
+    bucket.add(name, size=MAX_FILE_SIZE + 1)
+
+    with pytest.raises(HTTPException) as excinfo:
+        minio_utils.confirm_upload("book_audio", name)
+
+    assert excinfo.value.detail == minio_utils.FILE_SIZE_LIMIT_MESSAGE == "File size exceeds 100 MB"
+    assert bucket.objects == {}
+
+
+def test_sweep_removes_only_old_pending_uploads(bucket):
+    bucket.add(f"{PENDING_UPLOAD_PREFIX}books/old.png", age=timedelta(days=2))
+    bucket.add(f"{PENDING_UPLOAD_PREFIX}books/new.png", age=timedelta(minutes=1))
+    bucket.add("books/confirmed.png", age=timedelta(days=30))
+
+    assert minio_utils.sweep_pending_uploads(timedelta(days=1)) == 1
+    assert sorted(bucket.objects) == ["books/confirmed.png", f"{PENDING_UPLOAD_PREFIX}books/new.png"]
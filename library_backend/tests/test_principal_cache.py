@@ -0,0 +1,64 @@
+"""
+Principal cache invalidation across workers: a user change is broadcast
+over NOTIFY and drops the entry in every worker's in-process cache.
+"""
+import asyncio
+
+import pytest
+
+from app.core.pg_listener import pg_listener
+from app.core.principal import Principal, PrincipalCache, principal_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def _principal(user_id, role="user"):
+    return Principal(user_id=user_id, role=role)
+
+
+def test_notify_drops_the_named_user():
+    cache = PrincipalCache(ttl=60, maxsize=10)
+    cache.local.set("a", _principal("a"))
+    cache.local.set("b", _principal("b"))
+
+    cache._on_notify("a")
+
+    assert cache.peek("a") is None
+    assert cache.peek("b") == _principal("b")
+
+
+def test_listener_reconnect_drops_everything():
+    cache = PrincipalCache(ttl=60, maxsize=10)
+    cache.local.set("a", _principal("a"))
+
+    cache._on_notify(None)
+
+    assert len(cache.local) == 0
+
+
+async def _until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+async def test_committed_change_reaches_other_workers(db):
+    pg_listener.start()
+    try:
+        # Wait for the listener's reconnect flush, then cache as another worker would have
+        principal_cache.local.set("sentinel", _principal("sentinel"))
+        await _until(lambda: principal_cache.peek("sentinel") is None)
+        principal_cache.local.set("demoted", _principal("demoted", role="admin"))
+        principal_cache.local.set("other", _principal("other"))
+
+        await principal_cache.notify_invalidation(db, "demoted")
+        await asyncio.sleep(0.1)
+        assert principal_cache.peek("demoted") is not None   # not before commit
+        await db.commit()
+
+        await _until(lambda: principal_cache.peek("demoted") is None)
+        assert principal_cache.peek("other") == _principal("other")
+    finally:
+        await pg_listener.stop()
+        principal_cache.local.clear()
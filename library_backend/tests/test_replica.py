@@ -0,0 +1,137 @@
+"""
+Read routing: lag-based fallback to the primary, and read-your-writes for a
+user who just wrote. Runs without a database; the lag query and session
+factories are stubbed.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app import dependencies, main
+from app.core.replica import RecentWriters, ReplicaMonitor
+from app.core.security import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+class StubMonitor(ReplicaMonitor):
+    """ReplicaMonitor whose lag query returns (or raises) canned results."""
+
+    def __init__(self, *lags, max_lag=5.0, interval=0.0, timeout=1.0):
+        super().__init__(engine=None, max_lag=max_lag, interval=interval, timeout=timeout)
+        self.lags = list(lags)
+        self.calls = 0
+
+    async def _measure(self) -> float:
+        self.calls += 1
+        lag = self.lags.pop(0)
+        if isinstance(lag, BaseException):
+            raise lag
+        if lag == "hang":
+            await asyncio.sleep(10)
+        return lag
+
+
+async def test_healthy_within_max_lag():
+    monitor = StubMonitor(0.0, 4.9)
+    assert await monitor.healthy()
+    assert await monitor.healthy()
+    assert monitor.lag == 4.9
+
+
+async def test_unhealthy_beyond_max_lag():
+    monitor = StubMonitor(5.1)
+    assert not await monitor.healthy()
+    assert monitor.metrics() == {"healthy": False, "lag_seconds": 5.1, "max_lag_seconds": 5.0}
+
+
+async def test_failed_lag_check_falls_back_to_primary():
+    monitor = StubMonitor(ConnectionRefusedError())
+    assert not await monitor.healthy()
+    assert monitor.lag is None
+
+
+async def test_slow_lag_check_times_out():
+    monitor = StubMonitor("hang", timeout=0.01)
+    assert not await monitor.healthy()
+
+
+async def test_lag_reading_is_reused_within_interval():
+    monitor = StubMonitor(0.0, 60.0, interval=3600)
+    assert await monitor.healthy()
+    assert await monitor.healthy()
+    assert monitor.calls == 1
+
+
+async def test_recovers_once_lag_drops():
+    monitor = StubMonitor(30.0, 1.0)
+    assert not await monitor.healthy()
+    assert await monitor.healthy()
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    """
+    An app with the write-marking middleware, a write route and a read route
+    that reports which session factory get_read_db picked.
+    """
+    def factory(name):
+        @asynccontextmanager
+        async def session():
+            yield name
+        return session
+
+    monitor = StubMonitor(*[0.0] * 10)
+    monkeypatch.setattr(dependencies, "replica_monitor", monitor)
+    monkeypatch.setattr(dependencies, "async_session", factory("primary"))
+    monkeypatch.setattr(dependencies, "read_session", factory("replica"))
+    writers = RecentWriters(window=60)
+    monkeypatch.setattr(dependencies, "recent_writers", writers)
+    monkeypatch.setattr(main, "recent_writers", writers)
+
+    app = FastAPI()
+    app.middleware("http")(main.mark_recent_writers)
+
+    @app.post("/write")
+    async def write():
+        return {}
+
+    @app.get("/read")
+    async def read(db=Depends(dependencies.get_read_db)):
+        return {"db": db}
+
+    return app, monitor
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id, 'user')}"}
+
+
+async def test_reads_go_to_replica_when_healthy(routing):
+    app, _ = routing
+    async with _client(app) as client:
+        assert (await client.get("/read", headers=_auth("reader"))).json() == {"db": "replica"}
+        assert (await client.get("/read")).json() == {"db": "replica"}
+
+
+async def test_writer_reads_own_writes_from_primary(routing):
+    app, _ = routing
+    async with _client(app) as client:
+        assert (await client.post("/write", headers=_auth("writer"))).status_code == 200
+        assert (await client.get("/read", headers=_auth("writer"))).json() == {"db": "primary"}
+        # Other users are unaffected
+        assert (await client.get("/read", headers=_auth("reader"))).json() == {"db": "replica"}
+
+
+async def test_lagging_replica_sends_reads_to_primary(routing):
+    app, monitor = routing
+    monitor.lags = [60.0]
+    async with _client(app) as client:
+        assert (await client.get("/read", headers=_auth("reader"))).json() == {"db": "primary"}
@@ -0,0 +1,59 @@
+"""
+The catalog search must stay servable by its GIN indexes. If the query's
+tsvector/tsquery or trigram expressions drift from the indexed ones,
+Postgres silently falls back to scanning every book.
+"""
+import pytest
+from sqlalchemy import select, text
+
+from app.crud.book import BookCRUD
+from app.models.book import Book
+from app.models.category import Category
+
+pytestmark = pytest.mark.anyio
+
+
+def _catalog_stmt():
+    # Same base query as BookCRUD.get_books
+    return select(Book, Category.category_title).join(Category, Category.category_id == Book.book_category_id)
+
+
+async def _plan(db, stmt) -> str:
+    conn = await db.connection()
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    # A near-empty table is cheapest to scan (or to walk through another
+    # index); rule both out so the plan shows whether the search index can
+    # serve the query at all
+    await conn.execute(text("SET LOCAL enable_seqscan = off"))
+    await conn.execute(text("SET LOCAL enable_indexscan = off"))
+    result = await conn.exec_driver_sql(f"EXPLAIN {compiled}", params)
+    plan = "\n".join(result.scalars().all())
+    await db.rollback()
+    return plan
+
+
+async def _seed(db):
+    category = Category(category_title="Fantasy")
+    db.add(category)
+    await db.flush()
+    db.add_all([
+        Book(book_title="The Hobbit", book_author="J. R. R. Tolkien", book_category_id=category.category_id),
+        Book(book_title="Earthsea", book_author="Ursula K. Le Guin", book_category_id=category.category_id),
+    ])
+    await db.commit()
+    await db.execute(text("ANALYZE books"))
+    await db.commit()
+
+
+async def test_fulltext_search_uses_search_vector_index(db):
+    await _seed(db)
+    plan = await _plan(db, BookCRUD._fulltext(_catalog_stmt(), "tolkien hobbit").limit(20))
+    assert "Bitmap Index Scan on ix_books_search_vector" in plan, plan
+
+
+async def test_fuzzy_search_uses_trigram_indexes(db):
+    await _seed(db)
+    plan = await _plan(db, BookCRUD._fuzzy(_catalog_stmt(), "tolkein").limit(20))
+    assert "Bitmap Index Scan on ix_books_book_title_trgm" in plan, plan
+    assert "Bitmap Index Scan on ix_books_book_author_trgm" in plan, plan
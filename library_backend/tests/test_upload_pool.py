@@ -0,0 +1,131 @@
+"""
+The MinIO upload pool: concurrency cap, UPLOAD_QUEUE_FULL backpressure and
+cleanup of partial multi-file uploads, against an in-memory MinIO stand-in.
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.utils import minio_utils
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeMinio:
+    """Records objects in memory, like a bucket that never fails."""
+
+    def __init__(self):
+        self.objects = {}
+        self.removed = []
+
+    def put_object(self, bucket_name, object_name, data, length, **kwargs):
+        self.objects[object_name] = data.read()
+
+    def remove_object(self, bucket_name, object_name):
+        self.removed.append(object_name)
+        self.objects.pop(object_name, None)
+
+
+@pytest.fixture
+def upload_pool(monkeypatch):
+    """A fresh pool of `size` workers with `queue` waiting slots."""
+    executors = []
+
+    def configure(size: int, queue: int):
+        monkeypatch.setattr(settings, "MINIO_UPLOAD_CONCURRENCY", size)
+        monkeypatch.setattr(settings, "MINIO_UPLOAD_MAX_QUEUE", queue)
+        executor = ThreadPoolExecutor(max_workers=size)
+        executors.append(executor)
+        monkeypatch.setattr(minio_utils, "_upload_executor", executor)
+        monkeypatch.setattr(minio_utils, "_upload_slots", asyncio.Semaphore(size))
+        monkeypatch.setattr(minio_utils, "_upload_waiting", 0)
+
+    yield configure
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def fake_minio(monkeypatch):
+    client = FakeMinio()
+    monkeypatch.setattr(minio_utils, "minio_client", client)
+    return client
+
+
+async def test_pool_runs_at_most_concurrency_calls_at_once(upload_pool):
+    upload_pool(size=2, queue=10)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def call(n):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return n
+
+    results = await asyncio.gather(*(minio_utils.run_in_upload_pool(call, n) for n in range(6)))
+
+    assert results == list(range(6))
+    assert peak == 2
+
+
+async def test_full_queue_answers_503(upload_pool):
+    upload_pool(size=1, queue=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(minio_utils.run_in_upload_pool(release.wait))
+    await asyncio.sleep(0.01)
+    queued = asyncio.create_task(minio_utils.run_in_upload_pool(lambda: "queued"))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await minio_utils.run_in_upload_pool(lambda: "rejected")
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.detail.startswith("UPLOAD_QUEUE_FULL")
+
+    # Turned-away calls don't leak a queue place; the others still finish
+    release.set()
+    assert await running is True
+    assert await queued == "queued"
+    assert minio_utils._upload_waiting == 0
+    assert await minio_utils.run_in_upload_pool(lambda: "after") == "after"
+
+
+def _upload(name: str, body: bytes = b"data") -> UploadFile:
+    return UploadFile(io.BytesIO(body), filename=name)
+
+
+async def test_upload_files_async_stores_every_file(upload_pool, fake_minio):
+    upload_pool(size=2, queue=10)
+
+    photo, pdf, audio = await minio_utils.upload_files_async(
+        (_upload("cover.png"), "books"), (_upload("book.pdf"), "book_pdfs"), (None, "book_audios"),
+    )
+
+    assert audio is None
+    assert minio_utils.object_name_from_url(photo).startswith("books/")
+    assert minio_utils.object_name_from_url(pdf).startswith("book_pdfs/")
+    assert len(fake_minio.objects) == 2
+
+
+async def test_failed_upload_removes_the_others(upload_pool, fake_minio):
+    upload_pool(size=2, queue=10)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await minio_utils.upload_files_async(
+            (_upload("cover.png"), "books"), (_upload("book.exe"), "book_pdfs"),
+        )
+
+    assert excinfo.value.status_code == 400
+    assert fake_minio.objects == {}
+    assert len(fake_minio.removed) == 1